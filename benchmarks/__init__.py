@@ -0,0 +1,11 @@
+"""
+性能基准测试
+
+在仓库根目录下运行：
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --baseline micro.json
+    python -m benchmarks.macro --output macro.json
+    python -m benchmarks.macro --baseline macro.json
+
+测试图片由 benchmarks.corpus 自动生成并缓存在 benchmarks/.corpus 中。
+"""
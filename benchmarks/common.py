@@ -0,0 +1,146 @@
+"""
+基准测试的公共工具：加载配置、计时、输出结果和对比基线
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import PIL
+import yaml
+
+from src.entity.config import DEFAULT_CONFIG_FILENAME
+from src.entity.config import Config
+from src.entity.config import get_resource_path
+
+# 默认的回归阈值，耗时超过基线的百分比
+DEFAULT_THRESHOLD = 5.0
+
+
+def load_config(path=None) -> Config:
+    """
+    加载基准测试使用的配置，不会修改配置文件
+    :param path: 配置文件路径，为 None 时使用默认配置
+    :return: 配置对象，字体文件缺失时使用备选字体
+    """
+    with open(path or get_resource_path(DEFAULT_CONFIG_FILENAME), 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    base = data['base']
+    for key, alternative_key in (('font', 'alternative_font'), ('bold_font', 'alternative_bold_font')):
+        if not os.path.exists(get_resource_path(base[key].removeprefix('./'))):
+            base[key] = base[alternative_key]
+    return Config.from_snapshot(data, path)
+
+
+@dataclass
+class Timing(object):
+    """
+    单项基准测试的结果，时间单位为毫秒
+    """
+    name: str
+    repeat: int
+    median: float
+    min: float
+    mean: float
+    stdev: float
+
+    def __str__(self):
+        return f'{self.name:<56} median {self.median:9.2f} ms  min {self.min:9.2f} ms  stdev {self.stdev:7.2f} ms'
+
+
+def measure(name, func, setup=None, teardown=None, repeat=5, warmup=1) -> Timing:
+    """
+    多次执行 func 并统计耗时
+    :param name: 测试名称
+    :param func: 被测函数，参数为 setup 的返回值
+    :param setup: 每次执行前调用，不计入耗时，为 None 时 func 不带参数
+    :param teardown: 每次执行后以 setup 的返回值调用，不计入耗时
+    :param repeat: 计时的次数
+    :param warmup: 计时前预热的次数
+    :return: 统计结果
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        if teardown is not None:
+            teardown(*args)
+        if i >= warmup:
+            samples.append(elapsed)
+    return Timing(name, repeat, statistics.median(samples), min(samples), statistics.fmean(samples),
+                  statistics.stdev(samples) if len(samples) > 1 else 0.0)
+
+
+def environment() -> dict:
+    """
+    运行环境信息，随结果一起保存，便于判断两次结果是否可比
+    """
+    return {
+        'python': sys.version.split()[0],
+        'pillow': PIL.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def write_results(path, suite, results, **meta) -> None:
+    """
+    以 JSON 格式保存结果
+    :param path: 输出文件路径
+    :param suite: 测试套件名称
+    :param results: Timing 列表
+    :param meta: 额外记录的参数
+    """
+    data = {
+        'suite': suite,
+        'environment': environment(),
+        'meta': meta,
+        'results': [asdict(result) for result in results],
+    }
+    Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def compare_with_baseline(path, results, threshold=DEFAULT_THRESHOLD, key='median', higher_is_better=False,
+                          unit='ms') -> list[str]:
+    """
+    与基线结果对比并打印差异
+    :param path: 基线 JSON 文件路径
+    :param results: 本次的结果列表，元素为带有 name 字段的数据类
+    :param threshold: 回归阈值，百分比
+    :param key: 参与对比的字段
+    :param higher_is_better: 该字段是否越大越好，例如吞吐量
+    :param unit: 打印时使用的单位
+    :return: 超过阈值的测试名称列表
+    """
+    baseline = {item['name']: item for item in json.loads(Path(path).read_text(encoding='utf-8'))['results']}
+    regressions = []
+    print(f'\n对比基线 {path}：{key}（阈值 {threshold:.1f}%）')
+    for result in results:
+        if result.name not in baseline or baseline[result.name].get(key) is None:
+            print(f'{result.name:<56} 基线中不存在')
+            continue
+        old, new = baseline[result.name][key], getattr(result, key)
+        if new is None:
+            continue
+        change = (new - old) / old * 100 if old > 0 else 0.0
+        # 统一换算为“变差”的百分比
+        worse = -change if higher_is_better else change
+        mark = ''
+        if worse > threshold:
+            mark = '  <-- 变差'
+            regressions.append(result.name)
+        elif worse < -threshold:
+            mark = '  <-- 改善'
+        print(f'{result.name:<56} {old:9.2f} -> {new:9.2f} {unit}  {change:+7.1f}%{mark}')
+    return regressions
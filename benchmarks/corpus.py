@@ -0,0 +1,148 @@
+"""
+生成基准测试使用的合成 JPEG 图片
+
+图片内容为渐变叠加噪声，压缩率与真实照片接近；EXIF 中包含相机、镜头、拍摄参数等常见信息。
+竖拍图片与相机的输出方式一致：像素按横向存储，并写入方向标签 6。
+"""
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+CORPUS_DIR = Path(__file__).parent.joinpath('.corpus')
+DEFAULT_MEGAPIXELS = (6, 12, 24)
+# 3:2 画幅
+ASPECT_RATIO = 3 / 2
+QUALITY = 92
+
+
+@dataclass(frozen=True)
+class Camera(object):
+    """
+    写入 EXIF 的相机与镜头信息
+    """
+    make: str
+    model: str
+    lens_make: str
+    lens_model: str
+
+
+DEFAULT_CAMERA = Camera('NIKON CORPORATION', 'NIKON Z 7_2', 'NIKON', 'NIKKOR Z 24-70mm f/4 S')
+# 混合语料中使用的相机，None 表示不含 EXIF 的图片
+MIXED_CAMERAS = [
+    DEFAULT_CAMERA,
+    None,
+    Camera('Canon', 'Canon EOS R5', 'Canon', 'RF24-105mm F4 L IS USM'),
+    Camera('SONY', 'ILCE-7M4', 'SONY', 'FE 35mm F1.8'),
+    Camera('FUJIFILM', 'X-T5', 'FUJIFILM', 'XF33mmF1.4 R LM WR'),
+    Camera('Apple', 'iPhone 15 Pro', 'Apple', 'iPhone 15 Pro back triple camera 6.765mm f/1.78'),
+]
+# 混合语料中使用的像素数量（百万）
+MIXED_MEGAPIXELS = (6, 12, 24)
+
+
+@dataclass
+class CorpusImage(object):
+    """
+    测试图片
+    """
+    path: Path
+    megapixels: int
+    portrait: bool
+    camera: Camera | None = DEFAULT_CAMERA
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+
+def _build_exif(portrait: bool, camera: Camera) -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = camera.make  # Make
+    exif[0x0110] = camera.model  # Model
+    exif[0x0112] = 6 if portrait else 1  # Orientation
+    exif[0x0132] = '2023:04:09 12:19:19'  # DateTime
+    ifd = exif.get_ifd(0x8769)
+    ifd[0x829A] = IFDRational(1, 800)  # ExposureTime
+    ifd[0x829D] = IFDRational(4, 1)  # FNumber
+    ifd[0x8827] = 250  # ISOSpeedRatings
+    ifd[0x9003] = '2023:04:09 12:19:19'  # DateTimeOriginal
+    ifd[0x920A] = IFDRational(70, 1)  # FocalLength
+    ifd[0xA405] = 70  # FocalLengthIn35mmFilm
+    ifd[0xA433] = camera.lens_make  # LensMake
+    ifd[0xA434] = camera.lens_model  # LensModel
+    return exif
+
+
+def _build_pixels(width: int, height: int) -> Image.Image:
+    # 低分辨率生成后放大，避免在大图上逐像素生成噪声
+    small = (max(1, width // 8), max(1, height // 8))
+    gradient = Image.linear_gradient('L').resize(small)
+    channels = [
+        gradient,
+        gradient.transpose(Image.Transpose.ROTATE_90).resize(small),
+        Image.radial_gradient('L').resize(small),
+    ]
+    base = Image.merge('RGB', channels).resize((width, height), Image.Resampling.BICUBIC)
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    return Image.blend(base, noise, 0.25)
+
+
+def generate_image(path: Path, megapixels: int, portrait: bool, camera: Camera | None = DEFAULT_CAMERA) -> None:
+    """
+    生成一张测试图片
+    :param path: 输出路径
+    :param megapixels: 像素数量（百万）
+    :param portrait: 是否为竖拍，不含 EXIF 时直接按竖向存储像素
+    :param camera: 相机信息，为 None 时不写入 EXIF
+    """
+    height = int(math.sqrt(megapixels * 1_000_000 / ASPECT_RATIO))
+    width = int(height * ASPECT_RATIO)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if camera is None:
+        if portrait:
+            width, height = height, width
+        _build_pixels(width, height).save(path, quality=QUALITY)
+    else:
+        _build_pixels(width, height).save(path, quality=QUALITY, exif=_build_exif(portrait, camera).tobytes())
+
+
+def get_corpus(megapixels=DEFAULT_MEGAPIXELS, corpus_dir=CORPUS_DIR) -> list[CorpusImage]:
+    """
+    获取测试图片，不存在时生成
+    :param megapixels: 需要的像素数量列表，每种尺寸生成横拍和竖拍各一张
+    :param corpus_dir: 缓存目录
+    :return: 测试图片列表
+    """
+    images = []
+    for mp in megapixels:
+        for portrait in (False, True):
+            name = f'{mp}mp-{"portrait" if portrait else "landscape"}'
+            image = CorpusImage(Path(corpus_dir).joinpath(f'{name}.jpg'), mp, portrait)
+            if not image.path.exists():
+                generate_image(image.path, mp, portrait)
+            images.append(image)
+    return images
+
+
+def get_mixed_corpus(count=12, corpus_dir=CORPUS_DIR) -> list[CorpusImage]:
+    """
+    获取尺寸、方向、相机混合的测试图片，其中包含不含 EXIF 的图片，不存在时生成
+    :param count: 图片数量
+    :param corpus_dir: 缓存目录
+    :return: 测试图片列表
+    """
+    images = []
+    for i in range(count):
+        mp = MIXED_MEGAPIXELS[i % len(MIXED_MEGAPIXELS)]
+        portrait = i % 2 == 1
+        camera = MIXED_CAMERAS[i // 2 % len(MIXED_CAMERAS)]
+        name = f'mixed-{i:03d}-{mp}mp-{"portrait" if portrait else "landscape"}-{camera.make.split()[0].lower() if camera else "noexif"}'
+        image = CorpusImage(Path(corpus_dir).joinpath(f'{name}.jpg'), mp, portrait, camera)
+        if not image.path.exists():
+            generate_image(image.path, mp, portrait, camera)
+        images.append(image)
+    return images
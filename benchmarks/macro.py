@@ -0,0 +1,263 @@
+"""
+批量导出的端到端基准测试
+
+与 ProcessWorker 一样通过 BatchExecutor 根据配置快照构建处理链并导出图片，
+对每种布局以及阴影、白边、按原比例填充的开关组合分别统计吞吐量、单张耗时和内存峰值。
+每种组合在独立的子进程中运行，内存峰值互不影响，缓存也都从空开始。
+
+用法（在仓库根目录下运行）：
+    python -m benchmarks.macro --output macro.json
+    python -m benchmarks.macro --layouts simple square --toggles shadow --baseline macro.json
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.common import DEFAULT_THRESHOLD
+from benchmarks.common import compare_with_baseline
+from benchmarks.common import load_config
+from benchmarks.common import write_results
+from benchmarks.corpus import get_mixed_corpus
+from src.entity.batch import LAYOUT_PROCESSORS
+from src.entity.batch import BatchExecutor
+from src.utils import StageProfile
+
+# 开关名称到配置项的映射
+TOGGLES = {
+    'shadow': 'shadow',
+    'margin': 'white_margin',
+    'padding': 'padding_with_original_ratio',
+}
+
+# 与基线对比的指标：(字段, 是否越大越好, 单位)
+METRICS = [
+    ('images_per_second', True, 'img/s'),
+    ('p95', False, 'ms'),
+    ('peak_rss_mb', False, 'MB'),
+]
+
+# 采样内存占用的间隔（秒），两次采样之间的短暂峰值可能被漏掉
+RSS_SAMPLE_INTERVAL = 0.02
+
+
+@dataclass
+class Throughput(object):
+    """
+    一种配置组合的测试结果
+    """
+    name: str
+    images: int
+    errors: int
+    seconds: float
+    images_per_second: float
+    mb_per_second: float
+    # 单张图片的耗时（毫秒）
+    p50: float
+    p95: float
+    # 主进程与全部工作进程内存之和的峰值（采样得到），无法获取时为 None
+    peak_rss_mb: float | None
+    # 主进程自身的内存峰值，无法获取时为 None
+    parent_peak_rss_mb: float | None
+    # 已结束的子进程中单个进程的最大内存峰值，不是子进程之和，无法获取时为 None
+    child_peak_rss_mb: float | None
+
+    def __str__(self):
+        def mb(value):
+            return f'{value:8.1f} MB' if value is not None else '     n/a'
+
+        return (f'{self.name:<56} {self.images_per_second:7.2f} img/s  {self.mb_per_second:7.2f} MB/s  '
+                f'p50 {self.p50:8.1f} ms  p95 {self.p95:8.1f} ms  rss {mb(self.peak_rss_mb)} '
+                f'(主进程 {mb(self.parent_peak_rss_mb)}，单个子进程 {mb(self.child_peak_rss_mb)})  '
+                f'errors {self.errors}')
+
+
+def percentile(values, percent) -> float:
+    """
+    最近秩法计算百分位数
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def rusage_peaks_mb() -> tuple[float | None, float | None]:
+    """
+    获取当前进程的内存峰值，以及已结束子进程中单个进程的最大内存峰值
+    :return: (主进程, 单个子进程)，无法获取时为 None
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块
+        return None, None
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def _process_tree_rss(pid: int) -> int:
+    """
+    通过 /proc 统计进程及其全部子孙进程当前的内存占用之和
+    :return: 字节数
+    """
+    total = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+            for tid in os.listdir(f'/proc/{pid}/task'):
+                with open(f'/proc/{pid}/task/{tid}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            # 进程已经结束
+            continue
+    return total
+
+
+class RssSampler(object):
+    """
+    在后台线程中定期采样当前进程与全部子孙进程（如进程池的工作进程）的内存之和，记录最大值
+    只支持提供 /proc/<pid>/task/<tid>/children 的 Linux，其他平台的结果为 None
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.available = os.path.exists(f'/proc/{os.getpid()}/task/{threading.get_native_id()}/children')
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        if self.available:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+
+    def _run(self):
+        pid = os.getpid()
+        while True:
+            self._peak = max(self._peak, _process_tree_rss(pid))
+            if self._stop.wait(self.interval):
+                break
+
+    @property
+    def peak_mb(self) -> float | None:
+        return self._peak / (1024 * 1024) if self.available else None
+
+
+def run_case(snapshot: dict, sources: list, mode: str, workers: int) -> dict:
+    """
+    在子进程中导出一遍全部图片
+    :return: 总耗时、每张图片的耗时、失败数量、内存峰值和阶段耗时汇总
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        jobs = [(source, Path(output_dir).joinpath(source.name)) for source in sources]
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            results = list(BatchExecutor(snapshot, mode, workers).run(jobs))
+            seconds = time.perf_counter() - start
+    profile = StageProfile()
+    for result in results:
+        profile.add(result.timings)
+    parent_peak, child_peak = rusage_peaks_mb()
+    return {
+        'seconds': seconds,
+        'elapsed': [result.elapsed for result in results],
+        'errors': sum(result.error is not None for result in results),
+        'peak_rss_mb': sampler.peak_mb,
+        'parent_peak_rss_mb': parent_peak,
+        'child_peak_rss_mb': child_peak,
+        'profile': profile.format() if profile.images else None,
+    }
+
+
+def build_cases(config, layouts, toggles) -> list[tuple[str, dict]]:
+    """
+    生成布局与开关的全部组合
+    :return: [(名称, 配置快照)] 列表
+    """
+    cases = []
+    for layout in layouts:
+        for n in range(len(toggles) + 1):
+            for enabled in itertools.combinations(toggles, n):
+                snapshot = config.snapshot()
+                snapshot['layout']['type'] = layout
+                for toggle, key in TOGGLES.items():
+                    snapshot['global'][key]['enable'] = toggle in enabled
+                cases.append(('+'.join([layout, *enabled]), snapshot))
+    return cases
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='批量导出的端到端基准测试')
+    parser.add_argument('--count', type=int, default=12, help='测试图片数量')
+    parser.add_argument('--layouts', nargs='+', choices=list(LAYOUT_PROCESSORS), default=list(LAYOUT_PROCESSORS),
+                        help='参与测试的布局，默认全部')
+    parser.add_argument('--toggles', nargs='*', choices=list(TOGGLES), default=list(TOGGLES),
+                        help='参与组合的开关，默认全部')
+    parser.add_argument('--config', help='配置文件路径，默认使用 config.yaml.default')
+    parser.add_argument('--mode', help='批量处理的执行方式：serial/thread/process，默认使用配置中的设置')
+    parser.add_argument('--workers', type=int, help='并发数，默认使用配置中的设置')
+    parser.add_argument('--profile', action='store_true', help='打印每种组合中各处理阶段的耗时')
+    parser.add_argument('--output', help='结果输出的 JSON 文件路径')
+    parser.add_argument('--baseline', help='作为基线的 JSON 文件路径')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值，百分比')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.profile:
+        config.get_data()['base']['profile'] = True
+    mode = args.mode or config.get_batch_mode()
+    workers = args.workers or config.get_batch_workers()
+    corpus = get_mixed_corpus(args.count)
+    sources = [image.path for image in corpus]
+    megabytes = sum(path.stat().st_size for path in sources) / (1024 * 1024)
+    print(f'{len(sources)} 张图片，共 {megabytes:.1f} MB，执行方式 {mode}，并发数 {workers}\n')
+
+    results = []
+    for name, snapshot in build_cases(config, args.layouts, args.toggles):
+        # 每种组合使用一个新的子进程，内存峰值只反映该组合
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            case = executor.submit(run_case, snapshot, sources, mode, workers).result()
+        elapsed = [seconds * 1000 for seconds in case['elapsed']]
+        result = Throughput(name, len(sources), case['errors'], case['seconds'],
+                            len(sources) / case['seconds'], megabytes / case['seconds'],
+                            percentile(elapsed, 50), percentile(elapsed, 95), case['peak_rss_mb'],
+                            case['parent_peak_rss_mb'], case['child_peak_rss_mb'])
+        print(result)
+        if case['profile'] is not None:
+            print(case['profile'] + '\n')
+        results.append(result)
+
+    if args.output:
+        write_results(args.output, 'macro', results, count=len(sources), megabytes=megabytes, mode=mode,
+                      workers=workers)
+        print(f'\n结果已保存到 {Path(args.output).absolute()}')
+    failed = any(result.errors for result in results)
+    if args.baseline:
+        for key, higher_is_better, unit in METRICS:
+            if compare_with_baseline(args.baseline, results, args.threshold, key, higher_is_better, unit):
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
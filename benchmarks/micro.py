@@ -0,0 +1,180 @@
+"""
+处理器与图像工具函数的微基准测试
+
+分别测量 ImageContainer 的解码与保存、每个处理器以及 src/utils/image.py 中各个函数的耗时，
+每次执行前重新准备输入，准备过程不计入耗时。
+
+用法（在仓库根目录下运行）：
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --baseline micro.json --threshold 5
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+from benchmarks.common import DEFAULT_THRESHOLD
+from benchmarks.common import compare_with_baseline
+from benchmarks.common import load_config
+from benchmarks.common import measure
+from benchmarks.common import write_results
+from benchmarks.corpus import DEFAULT_MEGAPIXELS
+from benchmarks.corpus import get_corpus
+from src.entity.batch import LAYOUT_PROCESSORS
+from src.entity.image_container import ImageContainer
+from src.entity.image_processor import WATERMARK_STRIP_CACHE
+from src.entity.image_processor import MarginProcessor
+from src.entity.image_processor import PaddingToOriginalRatioProcessor
+from src.entity.image_processor import ShadowProcessor
+from src.utils import append_image_by_side
+from src.utils import blurred_background
+from src.utils import concatenate_image
+from src.utils import merge_images
+from src.utils import padding_image
+from src.utils import remove_white_edge
+from src.utils import resize_image_with_height
+from src.utils import resize_image_with_width
+from src.utils import shadow_canvas
+from src.utils import square_image
+from src.utils import text_to_image
+from src.utils.image import TEXT_IMAGE_CACHE
+
+# 不属于布局、但可以加入处理链的处理器
+EXTRA_PROCESSORS = [ShadowProcessor, MarginProcessor, PaddingToOriginalRatioProcessor]
+# remove_white_edge 逐像素遍历，只在小图上测量
+WHITE_EDGE_SIZE = 256
+
+
+def timed(args, name, func, **kwargs) -> list:
+    """
+    执行一项测试，名称不匹配 --filter 时跳过
+    :return: 包含测试结果的列表，跳过时为空列表
+    """
+    if args.filter not in name:
+        return []
+    return [measure(name, func, repeat=args.repeat, **kwargs)]
+
+
+def clear_caches() -> None:
+    WATERMARK_STRIP_CACHE.clear()
+    TEXT_IMAGE_CACHE.clear()
+
+
+def open_container(path, preview_size=None) -> ImageContainer:
+    """
+    打开图片并完成解码，处理器的耗时中不包含解码
+    """
+    container = ImageContainer(path, preview_size=preview_size)
+    container.get_watermark_img().load()
+    return container
+
+
+def close_container(container: ImageContainer) -> None:
+    container.close()
+
+
+def bench_container(image, args) -> list:
+    results = timed(args, f'container.open/{image.name}',
+                    lambda: close_container(open_container(image.path, args.preview_size)))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = Path(tmp_dir).joinpath(image.path.name)
+        results += timed(args, f'container.save/{image.name}', lambda container: container.save(target),
+                         setup=lambda: open_container(image.path, args.preview_size), teardown=close_container)
+    return results
+
+
+def bench_processors(image, config, args) -> list:
+    processors = list(LAYOUT_PROCESSORS.values()) + EXTRA_PROCESSORS
+    results = []
+    for processor_class in processors:
+        processor = processor_class(config)
+
+        def setup():
+            if not args.warm:
+                clear_caches()
+            return open_container(image.path, args.preview_size)
+
+        results += timed(args, f'processor.{processor_class.LAYOUT_ID}/{image.name}', processor.process,
+                         setup=setup, teardown=close_container)
+    return results
+
+
+def bench_helpers(image, config, args) -> list:
+    with ImageContainer(image.path, preview_size=args.preview_size).get_img() as img:
+        source = img.convert('RGB')
+    rgba = source.convert('RGBA')
+    width, height = source.size
+    font, bold_font = config.get_font(), config.get_bold_font()
+    text = 'NIKKOR Z 24-70mm f/4 S'
+    strip = Image.new('RGBA', (width, width // 20), color='white')
+    radius = 35 * width / max(width, height)
+    name = image.name
+
+    def text_setup():
+        if not args.warm:
+            TEXT_IMAGE_CACHE.clear()
+
+    def strip_parts():
+        return [text_to_image(text, font, bold_font), text_to_image('70mm  f/4.0  1/800s  ISO250', font, bold_font)]
+
+    cases = [
+        ('text_to_image', lambda _: text_to_image(text, font, bold_font), text_setup),
+        ('padding_image', lambda _: padding_image(source, width // 20, 'tblr', color='white'), None),
+        ('square_image', lambda _: square_image(source, auto_close=False), None),
+        ('resize_image_with_width', lambda _: resize_image_with_width(source, width // 2, auto_close=False), None),
+        ('resize_image_with_height', lambda _: resize_image_with_height(source, height // 2, auto_close=False),
+         None),
+        ('merge_images', lambda _: merge_images([rgba, strip], axis=1), None),
+        ('concatenate_image', lambda parts: concatenate_image(parts), strip_parts),
+        ('append_image_by_side', lambda parts: append_image_by_side(strip.copy(), parts, is_start=True),
+         strip_parts),
+        ('shadow_canvas', lambda _: shadow_canvas(width, height, max(width, height) // 512), None),
+        ('blurred_background', lambda _: blurred_background(source, radius, (int(width * 1.18), int(height * 1.18))),
+         None),
+        ('remove_white_edge', lambda small: remove_white_edge(small),
+         lambda: padding_image(source.resize((WHITE_EDGE_SIZE, WHITE_EDGE_SIZE)), 16, 'tblr', color='white')),
+    ]
+    results = []
+    for case, func, setup in cases:
+        results += timed(args, f'image.{case}/{name}', func, setup=setup or (lambda: None))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='处理器与图像工具函数的微基准测试')
+    parser.add_argument('--megapixels', type=int, nargs='+', default=list(DEFAULT_MEGAPIXELS),
+                        help='测试图片的像素数量（百万），每种尺寸各生成一张横拍和竖拍图片')
+    parser.add_argument('--repeat', type=int, default=5, help='每项测试的计时次数')
+    parser.add_argument('--filter', default='', help='只运行名称中包含该字符串的测试')
+    parser.add_argument('--config', help='配置文件路径，默认使用 config.yaml.default')
+    parser.add_argument('--preview-size', type=int, help='以预览模式解码图片，长边的最大尺寸')
+    parser.add_argument('--warm', action='store_true', help='保留水印条和文字图片缓存，测量缓存命中时的耗时')
+    parser.add_argument('--output', help='结果输出的 JSON 文件路径')
+    parser.add_argument('--baseline', help='作为基线的 JSON 文件路径')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值，百分比')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    results = []
+    for image in get_corpus(args.megapixels):
+        results += bench_container(image, args)
+        results += bench_processors(image, config, args)
+        results += bench_helpers(image, config, args)
+    for result in results:
+        print(result)
+
+    if args.output:
+        write_results(args.output, 'micro', results, megapixels=args.megapixels, repeat=args.repeat,
+                      preview_size=args.preview_size, warm=args.warm)
+        print(f'\n结果已保存到 {Path(args.output).absolute()}')
+    if args.baseline:
+        return 1 if compare_with_baseline(args.baseline, results, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,31 +1,28 @@
 """
 Semi-Utils GUI - 启动入口
+
+python main.py          启动图形界面
+python main.py batch    命令行批量处理，参数见 python main.py batch --help
 """
 
 import os
 import sys
+from multiprocessing import freeze_support
+
+# 最先导入，作为启动计时的起点
+from src.startup import STARTUP_TRACE
 
+if __name__ == "__main__":
+    # 打包后进程池的工作进程也从这里启动，必须在导入 Qt 和其他模块之前转入工作进程
+    freeze_support()
 
-def get_working_dir():
-    """获取工作目录（用户数据存放位置）"""
-    if getattr(sys, 'frozen', False):
-        # 打包后的环境
-        if sys.platform == 'darwin':
-            # macOS .app 包，工作目录设为 .app 所在目录
-            app_path = os.path.dirname(sys.executable)  # Contents/MacOS
-            app_path = os.path.dirname(app_path)  # Contents
-            app_path = os.path.dirname(app_path)  # .app
-            app_path = os.path.dirname(app_path)  # .app 所在目录
-            return app_path
-        else:
-            # Windows/Linux
-            return os.path.dirname(sys.executable)
-    else:
-        # 开发环境
-        return os.path.dirname(os.path.abspath(__file__))
+    from src.utils.file import get_working_dir
 
+    if sys.argv[1:2] == ['batch']:
+        # 命令行批量处理，不导入 Qt
+        from src.cli import climain
+        sys.exit(climain(sys.argv[2:], get_working_dir()))
 
-if __name__ == "__main__":
     # 切换工作目录
     os.chdir(get_working_dir())
 
@@ -33,5 +30,6 @@ if __name__ == "__main__":
     os.makedirs('./input', exist_ok=True)
     os.makedirs('./output', exist_ok=True)
 
-    from src.gui import guimain
+    with STARTUP_TRACE.span('import src.gui'):
+        from src.gui import guimain
     guimain()
@@ -0,0 +1,148 @@
+"""
+Semi-Utils 命令行批量处理
+
+不依赖 Qt，也不导入 src.init 中的菜单，可以在服务器、定时任务和容器中使用：
+    python main.py batch --input ./photos --output ./export --set layout.type=simple --set base.quality=90
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from multiprocessing import freeze_support
+from pathlib import Path
+
+import yaml
+
+from src.entity.batch import BatchExecutor
+from src.entity.config import Config
+from src.entity.manifest import ExportManifest
+from src.entity.manifest import config_fingerprint
+from src.utils import StageProfile
+from src.utils import get_file_list
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = 'config.yaml'
+
+
+def parse_override(item: str) -> tuple[list[str], object]:
+    """
+    解析 --set 参数
+    :param item: 形如 base.quality=90 的字符串，值按 YAML 解析
+    :return: (配置项路径, 值)
+    """
+    key, sep, value = item.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f'无效的配置项 {item}，格式应为 key.path=value')
+    return key.split('.'), yaml.safe_load(value)
+
+
+def apply_overrides(data: dict, overrides) -> None:
+    """
+    将 --set 参数写入配置数据，只允许修改已有的配置节
+    :param data: 配置数据
+    :param overrides: parse_override 的结果列表
+    """
+    for keys, value in overrides:
+        node = data
+        for key in keys[:-1]:
+            if not isinstance(node.get(key), dict):
+                raise KeyError(f'配置中不存在 {".".join(keys[:-1])}')
+            node = node[key]
+        node[keys[-1]] = value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='main.py batch', description='为目录中的图片批量添加水印，不启动图形界面')
+    parser.add_argument('-i', '--input', type=Path, help='输入目录，默认使用配置中的 base.input_dir')
+    parser.add_argument('-o', '--output', type=Path, help='输出目录，默认使用配置中的 base.output_dir')
+    parser.add_argument('-c', '--config', type=Path, help=f'配置文件路径，默认使用工作目录中的 {DEFAULT_CONFIG_PATH}')
+    parser.add_argument('-s', '--set', dest='overrides', type=parse_override, action='append', default=[],
+                        metavar='KEY=VALUE', help='覆盖配置项，可重复使用，例如 --set layout.type=simple')
+    parser.add_argument('-q', '--quiet', action='store_true', help='只输出错误信息')
+    return parser
+
+
+def climain(argv=None, working_dir=None) -> int:
+    """
+    命令行入口
+    :param argv: 命令行参数，不含子命令
+    :param working_dir: 工作目录，命令行中的相对路径仍相对于调用时的当前目录
+    :return: 退出码，有图片处理失败时为 1
+    """
+    args = build_parser().parse_args(argv)
+    # 其他模块的日志只输出警告和错误，进度由本模块输出
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logger.setLevel(logging.ERROR if args.quiet else logging.INFO)
+
+    # 切换工作目录之前将命令行中的路径转换为绝对路径
+    input_dir = args.input.absolute() if args.input else None
+    output_dir = args.output.absolute() if args.output else None
+    config_path = args.config.absolute() if args.config else None
+    if config_path is not None and not config_path.exists():
+        logger.error(f'配置文件不存在: {config_path}')
+        return 2
+    if working_dir is not None:
+        os.chdir(working_dir)
+
+    config = Config(str(config_path or DEFAULT_CONFIG_PATH))
+    try:
+        apply_overrides(config.get_data(), args.overrides)
+    except KeyError as e:
+        logger.error(e.args[0])
+        return 2
+    if input_dir is not None:
+        config.get_data()['base']['input_dir'] = str(input_dir)
+    if output_dir is not None:
+        config.get_data()['base']['output_dir'] = str(output_dir)
+
+    input_dir = Path(config.get_input_dir())
+    if not input_dir.is_dir():
+        logger.error(f'输入目录不存在: {input_dir}')
+        return 2
+    source_paths = get_file_list(input_dir)
+    output_dir = Path(config.get_output_dir())
+    jobs = [(source_path, output_dir.joinpath(source_path.name)) for source_path in source_paths]
+
+    # 与图形界面一致：增量导出时跳过已是最新的文件
+    manifest = ExportManifest(output_dir)
+    fingerprint = config_fingerprint(config)
+    skipped = []
+    if config.has_incremental_enabled():
+        jobs, skipped = manifest.split_jobs(jobs, fingerprint)
+    total = len(jobs)
+    logger.info(f'共 {len(source_paths)} 张图片，跳过 {len(skipped)} 张，'
+                f'执行方式 {config.get_batch_mode()}，并发数 {config.get_batch_workers()}')
+
+    executor = BatchExecutor(config.snapshot(), config.get_batch_mode(), config.get_batch_workers())
+    profile = StageProfile() if config.has_profiling_enabled() else None
+    failed = 0
+    start = time.perf_counter()
+    try:
+        for done, result in enumerate(executor.run(jobs), 1):
+            if result.error is not None:
+                failed += 1
+                logger.error(f'[{done}/{total}] 处理 {result.source_path.name} 失败: {result.error}')
+            else:
+                manifest.record(result.source_path, result.target_path, fingerprint)
+                logger.info(f'[{done}/{total}] {result.source_path.name}')
+            if profile is not None:
+                profile.add(result.timings)
+    except KeyboardInterrupt:
+        executor.cancel()
+        logger.error('已取消')
+        return 130
+    finally:
+        manifest.save()
+
+    logger.info(f'完成 {total - failed} 张，失败 {failed} 张，耗时 {time.perf_counter() - start:.1f}s')
+    if profile is not None and profile.images:
+        logger.info(profile.format())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    freeze_support()
+    sys.exit(climain())
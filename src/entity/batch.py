@@ -0,0 +1,226 @@
+"""
+批量处理引擎
+
+支持串行、线程池、进程池三种执行方式。每个工作单元都会根据可 pickle 的配置快照
+构建自己的 Config 与 ProcessorChain，因此不同工作单元之间不共享任何可变状态。
+本模块不依赖 Qt，可以在无界面的环境中使用。
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.entity.config import Config
+from src.entity.image_container import ImageContainer
+from src.entity.image_processor import BackgroundBlurProcessor
+from src.entity.image_processor import BackgroundBlurWithWhiteBorderProcessor
+from src.entity.image_processor import CustomWatermarkProcessor
+from src.entity.image_processor import DarkWatermarkLeftLogoProcessor
+from src.entity.image_processor import DarkWatermarkRightLogoProcessor
+from src.entity.image_processor import MarginProcessor
+from src.entity.image_processor import PaddingToOriginalRatioProcessor
+from src.entity.image_processor import ProcessorChain
+from src.entity.image_processor import PureWhiteMarginProcessor
+from src.entity.image_processor import ShadowProcessor
+from src.entity.image_processor import SimpleProcessor
+from src.entity.image_processor import SquareProcessor
+from src.entity.image_processor import WatermarkLeftLogoProcessor
+from src.entity.image_processor import WatermarkRightLogoProcessor
+from src.utils import LRUCache
+from src.utils import StageTimer
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODE_SERIAL = 'serial'
+BATCH_MODE_THREAD = 'thread'
+BATCH_MODE_PROCESS = 'process'
+
+# 布局 ID 到处理器类型的映射
+LAYOUT_PROCESSORS = {processor.LAYOUT_ID: processor for processor in [
+    WatermarkLeftLogoProcessor,
+    WatermarkRightLogoProcessor,
+    DarkWatermarkLeftLogoProcessor,
+    DarkWatermarkRightLogoProcessor,
+    CustomWatermarkProcessor,
+    SquareProcessor,
+    SimpleProcessor,
+    BackgroundBlurProcessor,
+    BackgroundBlurWithWhiteBorderProcessor,
+    PureWhiteMarginProcessor,
+]}
+
+
+def build_processor_chain(config: Config, stage_cache: LRUCache | None = None) -> ProcessorChain:
+    """
+    根据配置构建处理链
+    :param config: 配置对象，处理链中的所有处理器都绑定到该配置
+    :param stage_cache: 各阶段输出的缓存，预览时使用 STAGE_CACHE
+    :return: 处理链
+    """
+    layout_type = config.get_layout_type()
+    processor_chain = ProcessorChain(stage_cache)
+
+    # 如果需要添加阴影
+    if config.has_shadow_enabled() and 'square' != layout_type:
+        processor_chain.add(ShadowProcessor(config))
+
+    # 根据布局添加不同的水印处理器
+    processor_chain.add(LAYOUT_PROCESSORS.get(layout_type, SimpleProcessor)(config))
+
+    # 如果需要添加白边
+    if config.has_white_margin_enabled() and 'watermark' in layout_type:
+        processor_chain.add(MarginProcessor(config))
+
+    # 如果需要按原有比例填充
+    if config.has_padding_with_original_ratio_enabled() and 'square' != layout_type:
+        processor_chain.add(PaddingToOriginalRatioProcessor(config))
+
+    return processor_chain
+
+
+@dataclass
+class BatchResult(object):
+    """
+    单张图片的处理结果
+    """
+    source_path: Path
+    target_path: Path
+    error: str | None = None
+    # 处理耗时（秒），包含解码、处理和保存
+    elapsed: float = 0.0
+    # 开启阶段计时时为 StageTimer.records，否则为 None
+    timings: list | None = None
+
+
+class BatchContext(object):
+    """
+    工作单元的处理上下文，持有独立的配置对象和处理链
+    """
+
+    def __init__(self, snapshot: dict):
+        self.config = Config.from_snapshot(snapshot)
+        self.processor_chain = build_processor_chain(self.config)
+        self.profile = self.config.has_profiling_enabled()
+
+    def process(self, source_path: Path, target_path: Path) -> BatchResult:
+        start = time.perf_counter()
+        timer = StageTimer() if self.profile else None
+        try:
+            # 每张图片只处理一次，直接解析 EXIF，不经过元数据缓存
+            container = ImageContainer(source_path, self.config.use_equivalent_focal_length(), timer=timer,
+                                       use_metadata_store=False)
+            self.processor_chain.process(container)
+            container.save(target_path, quality=self.config.get_quality())
+            container.close()
+        except Exception as e:
+            logger.exception(f'处理 {source_path} 失败: {e}')
+            return BatchResult(source_path, target_path, str(e), time.perf_counter() - start)
+        return BatchResult(source_path, target_path, elapsed=time.perf_counter() - start,
+                           timings=timer.records if timer is not None else None)
+
+
+# 线程池中每个线程的处理上下文
+_thread_local = threading.local()
+# 进程池中每个进程的处理上下文
+_process_context: BatchContext | None = None
+
+
+def _init_thread_context(snapshot: dict) -> None:
+    _thread_local.context = BatchContext(snapshot)
+
+
+def _process_in_thread(source_path: Path, target_path: Path) -> BatchResult:
+    return _thread_local.context.process(source_path, target_path)
+
+
+def _init_process_context(snapshot: dict) -> None:
+    global _process_context
+    _process_context = BatchContext(snapshot)
+
+
+def _process_in_process(source_path: Path, target_path: Path) -> BatchResult:
+    return _process_context.process(source_path, target_path)
+
+
+class BatchExecutor(object):
+    """
+    批量处理执行器
+    """
+
+    def __init__(self, snapshot: dict, mode: str = BATCH_MODE_PROCESS, max_workers: int = 1):
+        """
+        :param snapshot: 配置快照，见 Config.snapshot()
+        :param mode: 执行方式，serial/thread/process
+        :param max_workers: 最大并发数
+        """
+        self.snapshot = snapshot
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """
+        取消执行，正在处理的图片会处理完毕，尚未开始的图片不再处理
+        """
+        self._cancelled = True
+
+    def run(self, jobs):
+        """
+        执行批量处理
+        :param jobs: (源文件路径, 目标文件路径) 列表
+        :return: 按完成顺序产出 BatchResult 的生成器
+        """
+        jobs = list(jobs)
+        if self.mode == BATCH_MODE_SERIAL or self.max_workers == 1 or len(jobs) <= 1:
+            yield from self._run_serial(jobs)
+        elif self.mode == BATCH_MODE_THREAD:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                          initializer=_init_thread_context,
+                                          initargs=(self.snapshot,))
+            yield from self._run_in_executor(executor, _process_in_thread, jobs)
+        else:
+            # 统一使用 spawn，避免在已启动 Qt 线程的进程中 fork
+            executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                           mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_init_process_context,
+                                           initargs=(self.snapshot,))
+            yield from self._run_in_executor(executor, _process_in_process, jobs)
+
+    def _run_serial(self, jobs):
+        context = BatchContext(self.snapshot)
+        for source_path, target_path in jobs:
+            if self._cancelled:
+                break
+            yield context.process(source_path, target_path)
+
+    def _run_in_executor(self, executor, fn, jobs):
+        # 限制同时提交的任务数量，以便取消时能尽快停止
+        window = self.max_workers * 2
+        job_iter = iter(jobs)
+        futures = {}
+        try:
+            while True:
+                while not self._cancelled and len(futures) < window:
+                    job = next(job_iter, None)
+                    if job is None:
+                        break
+                    futures[executor.submit(fn, *job)] = job
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_path, target_path = futures.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        logger.exception(f'处理 {source_path} 失败: {e}')
+                        yield BatchResult(source_path, target_path, str(e))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,11 +1,18 @@
+import copy
+import logging
 import os
+import re
 import shutil
 import sys
+import threading
+from collections import OrderedDict
 
 import yaml
 from PIL import Image
 from PIL import ImageFont
 
+from src.entity.logo import LogoAsset
+from src.entity.logo import load_logo_asset
 from src.enums.constant import CUSTOM_VALUE
 from src.enums.constant import LOCATION_LEFT_BOTTOM
 from src.enums.constant import LOCATION_LEFT_TOP
@@ -14,6 +21,8 @@ from src.enums.constant import LOCATION_RIGHT_TOP
 
 DEFAULT_CONFIG_FILENAME = 'config.yaml.default'
 
+logger = logging.getLogger(__name__)
+
 
 def get_resource_path(filename):
     """获取资源文件路径，支持 PyInstaller 打包后的环境"""
@@ -55,22 +64,70 @@ FONT_SIZE = 240
 BOLD_FONT_SIZE = 260
 
 
+# 字体注册表中最多保留的字体对象数量，默认配置只使用 4 个
+FONT_REGISTRY_MAX_ENTRIES = 32
+
+
+class FontRegistry(object):
+    """
+    字体对象注册表，同一进程内每个 (字体路径, 字号) 只解析一次
+    超出数量上限时淘汰最久未使用的字体，其他配置和线程仍在使用的字体不受影响
+    """
+
+    def __init__(self, max_entries=FONT_REGISTRY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, size) -> ImageFont.FreeTypeFont:
+        """
+        获取字体对象，首次使用时解析字体文件
+        :param path: 字体文件路径
+        :param size: 字号
+        :return: 字体对象
+        """
+        key = (path, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                return font
+        # 在锁外解析字体，不阻塞其他线程
+        font = ImageFont.truetype(path, size)
+        with self._lock:
+            font = self._fonts.setdefault(key, font)
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_entries:
+                self._fonts.popitem(last=False)
+        return font
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fonts.clear()
+
+
+FONT_REGISTRY = FontRegistry()
+
+
 class Config(object):
     """
     配置对象
     """
 
-    def __init__(self, path):
+    def __init__(self, path, data=None):
         self._path = path
-        self._ensure_config_exists()
-        with open(self._path, 'r', encoding='utf-8') as f:
-            self._data = yaml.safe_load(f)
-        self._logos = {}
+        if data is None:
+            self._ensure_config_exists()
+            with open(self._path, 'r', encoding='utf-8') as f:
+                self._data = yaml.safe_load(f)
+        else:
+            self._data = data
         self._left_top = ElementConfig(self._data['layout']['elements'][LOCATION_LEFT_TOP])
         self._left_bottom = ElementConfig(self._data['layout']['elements'][LOCATION_LEFT_BOTTOM])
         self._right_top = ElementConfig(self._data['layout']['elements'][LOCATION_RIGHT_TOP])
         self._right_bottom = ElementConfig(self._data['layout']['elements'][LOCATION_RIGHT_BOTTOM])
         self._makes = self._data['logo']['makes']
+        self._build_logo_index()
         self.bg_color = self._data['layout']['background_color'] \
             if 'background_color' in self._data['layout'] \
             else '#ffffff'
@@ -107,32 +164,77 @@ class Config(object):
             relative_path = relative_path[2:]
         return get_resource_path(relative_path)
 
+    def _build_logo_index(self) -> None:
+        """
+        建立厂商名称到 logo 路径的索引
+        """
+        self._logo_index = {m['id'].lower(): m['path'] for m in self._makes.values() if m['id'] != ''}
+        self._logo_paths = {}
+
+    def get_logo_path(self, make) -> str:
+        """
+        根据厂商获取 logo 文件路径
+        :param make: 厂商
+        :return: logo 文件路径，无法匹配时返回默认 logo 的路径
+        """
+        if make in self._logo_paths:
+            return self._logo_paths[make]
+        make_lower = make.lower()
+        path = self._logo_index.get(make_lower)
+        if path is None:
+            # EXIF 中的厂商名称常带有公司后缀，例如 NIKON CORPORATION，按单词查找
+            for word in re.split(r'\W+', make_lower):
+                if word in self._logo_index:
+                    path = self._logo_index[word]
+                    break
+        if path is None:
+            for logo_id, logo_path in self._logo_index.items():
+                if logo_id in make_lower:
+                    path = logo_path
+                    break
+        if path is None:
+            # 默认 logo 可能被修改，不写入索引
+            return self._get_asset_path(self._data['logo']['default']['path'])
+        path = self._get_asset_path(path)
+        self._logo_paths[make] = path
+        return path
+
+    def load_logo_asset(self, make) -> LogoAsset:
+        """
+        根据厂商获取 logo 资源
+        :param make: 厂商
+        :return: logo 资源，包含预先缩放的多个版本
+        """
+        return load_logo_asset(self.get_logo_path(make))
+
     def load_logo(self, make) -> Image.Image:
         """
         根据厂商获取 logo
         :param make: 厂商
         :return: logo
         """
-        # 已经读到内存中的 logo
-        if make in self._logos:
-            return self._logos[make]
-        # 未读取到内存中的 logo
-        for m in self._makes.values():
-            if m['id'] == '':
-                pass
-            if m['id'].lower() in make.lower():
-                logo_path = self._get_asset_path(m['path'])
-                logo = Image.open(logo_path)
-                self._logos[make] = logo
-                return logo
-        logo_path = self._get_asset_path(self._data['logo']['default']['path'])
-        logo = Image.open(logo_path)
-        self._logos[make] = logo
-        return logo
+        return self.load_logo_asset(make).image
 
     def get_data(self) -> dict:
         return self._data
 
+    def snapshot(self) -> dict:
+        """
+        生成配置快照，可被 pickle 后传递给其他进程
+        :return: 配置数据的深拷贝
+        """
+        return copy.deepcopy(self._data)
+
+    @classmethod
+    def from_snapshot(cls, data: dict, path=None):
+        """
+        根据配置快照创建配置对象，不会读写配置文件
+        :param data: snapshot() 生成的配置数据
+        :param path: 配置文件路径，仅在调用 save() 时使用
+        :return: 配置对象
+        """
+        return cls(path, data=copy.deepcopy(data))
+
     def get_input_dir(self):
         return self._data['base']['input_dir']
 
@@ -145,21 +247,69 @@ class Config(object):
     def get_quality(self):
         return self._data['base']['quality']
 
+    def has_incremental_enabled(self) -> bool:
+        """
+        是否只导出新增或修改过的图片
+        """
+        return self._data['base'].get('incremental', False)
+
+    def enable_incremental(self):
+        self._data['base']['incremental'] = True
+
+    def disable_incremental(self):
+        self._data['base']['incremental'] = False
+
+    def has_profiling_enabled(self) -> bool:
+        """
+        是否记录批量处理中各阶段的耗时
+        """
+        return self._data['base'].get('profile', False)
+
+    def get_batch_mode(self) -> str:
+        """
+        批量处理的执行方式：serial 串行，thread 线程池，process 进程池
+        """
+        return self._data['base'].get('batch_mode', 'process')
+
+    def get_batch_workers(self) -> int:
+        """
+        批量处理的并发数，0 表示使用全部 CPU 核心
+        """
+        workers = self._data['base'].get('batch_workers', 0)
+        return workers if workers > 0 else (os.cpu_count() or 1)
+
+    def _load_font(self, font_key, size) -> ImageFont.FreeTypeFont:
+        """
+        从字体注册表中获取字体对象，注册表以 (字体路径, 字号) 为键，字体配置变化后自然使用新的字体
+        :param font_key: base 中字体路径的配置项
+        :param size: 字号
+        :return: 字体对象
+        """
+        font_path = self._get_asset_path(self._data['base'][font_key])
+        return FONT_REGISTRY.get(font_path, size)
+
     def get_alternative_font(self):
-        font_path = self._get_asset_path(self._data['base']['alternative_font'])
-        return ImageFont.truetype(font_path, self.get_font_size())
+        return self._load_font('alternative_font', self.get_font_size())
 
     def get_alternative_bold_font(self):
-        font_path = self._get_asset_path(self._data['base']['alternative_bold_font'])
-        return ImageFont.truetype(font_path, self.get_bold_font_size())
+        return self._load_font('alternative_bold_font', self.get_bold_font_size())
 
     def get_font(self):
-        font_path = self._get_asset_path(self._data['base']['font'])
-        return ImageFont.truetype(font_path, self.get_font_size())
+        return self._load_font('font', self.get_font_size())
 
     def get_bold_font(self):
-        font_path = self._get_asset_path(self._data['base']['bold_font'])
-        return ImageFont.truetype(font_path, self.get_bold_font_size())
+        return self._load_font('bold_font', self.get_bold_font_size())
+
+    def preload_fonts(self) -> None:
+        """
+        预先解析配置中的全部字体，可在后台线程中调用
+        """
+        for load_font in [self.get_font, self.get_bold_font, self.get_alternative_font,
+                          self.get_alternative_bold_font]:
+            try:
+                load_font()
+            except OSError as e:
+                logger.error(f'preload font error: {e}')
 
     def get_font_size(self):
         font_size = self._data['base']['font_size']
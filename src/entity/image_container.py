@@ -1,21 +1,34 @@
 import logging
 import os
 import re
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
 
 from PIL import Image
-from PIL.Image import Transpose
 from dateutil import parser
 
 from src.entity.config import ElementConfig
 from src.enums.constant import *
+from src.utils import LRUCache
 from src.utils import calculate_pixel_count
 from src.utils import extract_attribute
 from src.utils import extract_gps_info
 from src.utils import extract_gps_lat_and_long
 from src.utils import get_exif
+from src.utils import get_metadata_store
+from src.utils import image_nbytes
+from src.utils import normalize_exif_orientation
+from src.utils import StageTimer
+from src.utils.exif import NORMAL_ORIENTATION
+from src.utils.profiling import STAGE_DECODE
+from src.utils.profiling import STAGE_ENCODE
+from src.utils.profiling import STAGE_EXIF
+from src.utils.image import ORIENTATION_TRANSPOSES
+from src.utils.image import ROTATED_ORIENTATIONS
 
 logger = logging.getLogger(__name__)
 
@@ -85,15 +98,119 @@ def get_focal_length(exif):
     return focal_length, focal_length_in_35mm_film
 
 
+@dataclass
+class DecodedSource(object):
+    """
+    解码并修正方向后的源图像及其元数据
+    """
+    img: Image.Image
+    exif: dict
+    orientation: int
+    # 修正方向后的原始宽高
+    original_width: int
+    original_height: int
+
+
+# 预览时反复使用的源图像，切换布局或设置时不需要重新解码
+DECODED_SOURCE_CACHE = LRUCache(max_bytes=128 * 1024 * 1024, sizeof=lambda source: image_nbytes(source.img))
+
+
+def _source_key(path, preview_size) -> tuple | None:
+    """
+    生成源图像的缓存键，文件被修改后缓存键随之变化
+    :return: 缓存键，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return str(Path(path).absolute()), stat.st_size, stat.st_mtime_ns, preview_size
+
+
+def decode_source(path, preview_size: int | None = None, timer: StageTimer | None = None,
+                  load: bool = False, use_metadata_store: bool = True) -> DecodedSource:
+    """
+    打开图片、读取 EXIF 并修正方向
+    :param path: 图片路径
+    :param preview_size: 预览模式下图片长边的最大尺寸，为 None 时按原始分辨率处理
+    :param timer: 阶段计时器，为 None 时不计时
+    :param load: 是否立即解码，为 False 时未缩放、未旋转的图像在首次使用时才解码
+    :param use_metadata_store: 是否通过元数据缓存读取 EXIF，为 False 时直接解析文件头，
+        不查询也不写入缓存，适合每张图片只处理一次的批量导出
+    :return: 源图像
+    """
+    img = Image.open(path)
+    start = time.perf_counter() if timer is not None else 0
+    # 图片已经打开，缓存未命中时直接使用已知的宽高，不再次打开图片
+    exif = get_metadata_store().get(path, img.size).exif if use_metadata_store else get_exif(path)
+    if timer is not None:
+        timer.record(STAGE_EXIF, start)
+        start = time.perf_counter()
+    orientation = int(exif.get(ExifId.ORIENTATION.value, NORMAL_ORIENTATION))
+    # 图像信息，宽高按照修正方向后的图像计算
+    if orientation in ROTATED_ORIENTATIONS:
+        original_width, original_height = img.height, img.width
+    else:
+        original_width, original_height = img.width, img.height
+
+    # 预览模式下直接以接近屏幕的分辨率解码（JPEG 使用 DCT 缩放），后续处理器均按比例计算尺寸
+    if preview_size is not None and max(img.size) > preview_size:
+        draft_ratio = preview_size / max(img.size)
+        img.draft(None, (int(img.width * draft_ratio), int(img.height * draft_ratio)))
+        img.thumbnail((preview_size, preview_size), Image.Resampling.BICUBIC)
+    # 修正图像方向，整个处理过程只旋转这一次，保存时改写 EXIF 中的方向标签
+    if orientation in ORIENTATION_TRANSPOSES:
+        img = img.transpose(ORIENTATION_TRANSPOSES[orientation])
+    if load or timer is not None:
+        img.load()
+    if timer is not None:
+        timer.record(STAGE_DECODE, start, img.size)
+    return DecodedSource(img, exif, orientation, original_width, original_height)
+
+
+class RenderCancelled(Exception):
+    """
+    渲染已被取消，由 ImageContainer.check_cancelled 抛出
+    """
+
+
 class ImageContainer(object):
-    def __init__(self, path: Path, is_use_equivalent_focal_length: bool = False):
+    def __init__(self, path: Path, is_use_equivalent_focal_length: bool = False, preview_size: int | None = None,
+                 timer: StageTimer | None = None, use_source_cache: bool = False,
+                 cancel_event: threading.Event | None = None, use_metadata_store: bool = True):
+        """
+        :param path: 图片路径
+        :param is_use_equivalent_focal_length: 是否使用等效焦距
+        :param preview_size: 预览模式下图片长边的最大尺寸，为 None 时按原始分辨率处理
+        :param timer: 阶段计时器，为 None 时不计时
+        :param use_source_cache: 是否使用 DECODED_SOURCE_CACHE，同一张图片反复渲染时（如预览）只解码一次
+        :param cancel_event: 取消事件，被设置后处理器在下一个检查点抛出 RenderCancelled
+        :param use_metadata_store: 是否通过元数据缓存读取 EXIF，见 decode_source
+        """
         self.path: Path = path
         self.target_path: Path | None = None
-        self.img: Image.Image = Image.open(path)
-        self.exif: dict = get_exif(path)
-        # 图像信息
-        self.original_width = self.img.width
-        self.original_height = self.img.height
+        self.timer: StageTimer | None = timer
+        self.cancel_event: threading.Event | None = cancel_event
+        # 源图像的缓存键，用于缓存各处理阶段的输出，未使用源图像缓存时为 None
+        self.source_key: tuple | None = None
+        if use_source_cache:
+            key = _source_key(path, preview_size)
+            self.source_key = key
+            source = DECODED_SOURCE_CACHE.get(key) if key is not None else None
+            if source is None:
+                source = decode_source(path, preview_size, timer, load=True, use_metadata_store=use_metadata_store)
+                if key is not None:
+                    DECODED_SOURCE_CACHE.put(key, source)
+            # 缓存中的图像由多个容器共享，每个容器使用自己的副本
+            self.img: Image.Image = source.img.copy()
+        else:
+            source = decode_source(path, preview_size, timer, use_metadata_store=use_metadata_store)
+            self.img: Image.Image = source.img
+        self.exif: dict = source.exif
+        self.orientation: int = source.orientation
+        self.original_width, self.original_height = source.original_width, source.original_height
+        # 当前图像相对于原始图像的缩放比例
+        self.scale = self.img.width / self.original_width
 
         self._param_dict = dict()
 
@@ -111,19 +228,6 @@ class ImageContainer(object):
         # 是否使用等效焦距
         self.use_equivalent_focal_length: bool = is_use_equivalent_focal_length
 
-        # 修正图像方向
-        self.orientation = self.exif[ExifId.ORIENTATION.value] if ExifId.ORIENTATION.value in self.exif else 1
-        if self.orientation == "Rotate 0":
-            pass
-        elif self.orientation == "Rotate 90 CW":
-            self.img = self.img.transpose(Transpose.ROTATE_270)
-        elif self.orientation == "Rotate 180":
-            self.img = self.img.transpose(Transpose.ROTATE_180)
-        elif self.orientation == "Rotate 270 CW":
-            self.img = self.img.transpose(Transpose.ROTATE_90)
-        else:
-            pass
-
         # 水印设置
         self.custom = '无'
         self.logo = None
@@ -230,6 +334,12 @@ class ImageContainer(object):
     def get_original_ratio(self):
         return self.original_width / self.original_height
 
+    def get_scale(self):
+        """
+        获取当前图像相对于原始图像的缩放比例，用于换算以像素为单位的参数
+        """
+        return self.scale
+
     def get_logo(self):
         return self.logo
 
@@ -252,27 +362,30 @@ class ImageContainer(object):
         if original_watermark_img is not None:
             original_watermark_img.close()
 
+    def check_cancelled(self) -> None:
+        """
+        检查渲染是否已被取消，在处理阶段之间和耗时的处理步骤之间调用
+        :raise RenderCancelled: 已被取消
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise RenderCancelled()
+
     def close(self):
         self.img.close()
-        self.watermark_img.close()
+        # 在第一个处理阶段之前取消时尚未生成
+        if self.watermark_img is not None:
+            self.watermark_img.close()
 
     def save(self, target_path, quality=100):
-        if self.orientation == "Rotate 0":
-            pass
-        elif self.orientation == "Rotate 90 CW":
-            self.watermark_img = self.watermark_img.transpose(Transpose.ROTATE_90)
-        elif self.orientation == "Rotate 180":
-            self.watermark_img = self.watermark_img.transpose(Transpose.ROTATE_180)
-        elif self.orientation == "Rotate 270 CW":
-            self.watermark_img = self.watermark_img.transpose(Transpose.ROTATE_270)
-        else:
-            pass
-
+        start = time.perf_counter() if self.timer is not None else 0
         if self.watermark_img.mode != 'RGB':
             self.watermark_img = self.watermark_img.convert('RGB')
 
         if 'exif' in self.img.info:
+            # 图像已经旋转为正向，将方向标签改写为 1，避免查看器再次旋转
             self.watermark_img.save(target_path, quality=quality, encoding='utf-8',
-                                    exif=self.img.info['exif'] if 'exif' in self.img.info else '')
+                                    exif=normalize_exif_orientation(self.img.info['exif']))
         else:
             self.watermark_img.save(target_path, quality=quality, encoding='utf-8')
+        if self.timer is not None:
+            self.timer.record(STAGE_ENCODE, start, self.watermark_img.size)
@@ -1,19 +1,22 @@
 import string
+import time
 
 from PIL import Image
-from PIL import ImageFilter
 from PIL import ImageOps
 
 from src.entity.config import Config
 from src.entity.image_container import ImageContainer
 from src.enums.constant import GRAY
 from src.enums.constant import TRANSPARENT
+from src.utils import LRUCache
 from src.utils import append_image_by_side
+from src.utils import blurred_background
 from src.utils import concatenate_image
 from src.utils import merge_images
 from src.utils import padding_image
 from src.utils import resize_image_with_height
 from src.utils import resize_image_with_width
+from src.utils import shadow_canvas
 from src.utils import square_image
 from src.utils import text_to_image
 
@@ -29,6 +32,14 @@ LARGE_VERTICAL_GAP = Image.new('RGBA', (20, 200), color=TRANSPARENT)
 LINE_GRAY = Image.new('RGBA', (20, 1000), color=GRAY)
 LINE_TRANSPARENT = Image.new('RGBA', (20, 1000), color=TRANSPARENT)
 
+# 渲染结果的版本，任何处理器的输出发生变化时加 1，增量导出据此重新导出旧版本生成的文件
+RENDER_VERSION = 1
+
+# 已渲染的水印条，在同一进程内的所有图片之间共享
+WATERMARK_STRIP_CACHE = LRUCache(max_bytes=128 * 1024 * 1024)
+# 预览时各处理阶段的输出，键为源图像与该阶段及之前所有阶段的设置
+STAGE_CACHE = LRUCache(max_bytes=96 * 1024 * 1024)
+
 
 class ProcessorComponent:
     """
@@ -46,21 +57,77 @@ class ProcessorComponent:
         """
         raise NotImplementedError
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        """
+        生成处理结果的缓存键，包含处理时读取的全部设置，输入图像由之前的阶段决定，不需要包含在内
+        :param container: 图片对象
+        :return: 缓存键，为 None 时不缓存该阶段及之后的阶段
+        """
+        return None
+
+    def prepare(self, container: ImageContainer) -> None:
+        """
+        处理前对共享状态的修改，缓存命中而跳过 process 时也会被调用
+        """
+        pass
+
     def add(self, component):
         raise NotImplementedError
 
 
 class ProcessorChain(ProcessorComponent):
-    def __init__(self):
+    def __init__(self, stage_cache: LRUCache | None = None):
+        """
+        :param stage_cache: 各阶段输出的缓存，为 None 时不缓存；只对带有 source_key 的图片生效
+        """
         super().__init__(None)
         self.components = []
+        self.stage_cache = stage_cache
 
     def add(self, component) -> None:
         self.components.append(component)
 
     def process(self, container: ImageContainer) -> None:
+        if self.stage_cache is not None and container.source_key is not None:
+            self._process_cached(container)
+            return
+        timer = container.timer
+        if timer is None:
+            for component in self.components:
+                container.check_cancelled()
+                component.process(container)
+            return
         for component in self.components:
+            container.check_cancelled()
+            start = time.perf_counter()
             component.process(container)
+            timer.record(component.LAYOUT_ID, start, container.get_watermark_img().size)
+
+    def _process_cached(self, container: ImageContainer) -> None:
+        """
+        依次查找各阶段的缓存，从第一个设置发生变化的阶段开始重新处理
+        """
+        timer = container.timer
+        key = container.source_key
+        for component in self.components:
+            container.check_cancelled()
+            start = time.perf_counter()
+            stage_key = component.cache_key(container)
+            if key is not None and stage_key is not None:
+                key = (key, type(component).__name__, stage_key)
+                cached = self.stage_cache.get(key)
+                if cached is not None:
+                    component.prepare(container)
+                    container.update_watermark_img(cached.copy())
+                else:
+                    component.process(container)
+                    self.stage_cache.put(key, container.get_watermark_img().copy())
+            else:
+                # 无法缓存的阶段之后，输入不再由缓存键决定
+                key = None
+                component.process(container)
+            if timer is not None:
+                timer.record(component.LAYOUT_ID, start, container.get_watermark_img().size)
 
 
 class EmptyProcessor(ProcessorComponent):
@@ -69,6 +136,9 @@ class EmptyProcessor(ProcessorComponent):
     def process(self, container: ImageContainer) -> None:
         pass
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return ()
+
 
 class ShadowProcessor(ProcessorComponent):
     LAYOUT_ID = 'shadow'
@@ -81,16 +151,17 @@ class ShadowProcessor(ProcessorComponent):
         # 计算阴影边框大小
         radius = int(max_pixel / 512)
 
-        # 创建阴影效果
-        shadow = Image.new('RGB', image.size, color='#6B696A')
-        shadow = ImageOps.expand(shadow, border=(radius * 2, radius * 2, radius * 2, radius * 2), fill=(255, 255, 255))
-        # 模糊阴影
-        shadow = shadow.filter(ImageFilter.GaussianBlur(radius=radius))
+        # 创建模糊后的阴影
+        shadow = shadow_canvas(image.width, image.height, radius, color='#6B696A', background=(255, 255, 255))
+        container.check_cancelled()
 
         # 将原始图像放置在阴影图像上方
         shadow.paste(image, (radius, radius))
         container.update_watermark_img(shadow)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return ()
+
 
 class SquareProcessor(ProcessorComponent):
     LAYOUT_ID = 'square'
@@ -100,6 +171,9 @@ class SquareProcessor(ProcessorComponent):
         image = container.get_watermark_img()
         container.update_watermark_img(square_image(image, auto_close=False))
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return ()
+
 
 class WatermarkProcessor(ProcessorComponent):
     LAYOUT_ID = 'watermark'
@@ -123,14 +197,36 @@ class WatermarkProcessor(ProcessorComponent):
     def is_logo_left(self):
         return self.logo_position == 'left'
 
-    def process(self, container: ImageContainer) -> None:
+    def _strip_key(self, container: ImageContainer) -> tuple:
         """
-        生成一个默认布局的水印图片
+        生成水印条的缓存键，包含水印条渲染时读取的全部设置
         :param container: 图片对象
-        :return: 添加水印后的图片对象
+        :return: 缓存键
+        """
+        config = self.config
+        base = config.get_data()['base']
+        logo_path = config.get_logo_path(container.make) if config.has_logo_enabled() else None
+        return (container.get_attribute_str(config.get_left_top()),
+                container.get_attribute_str(config.get_left_bottom()),
+                container.get_attribute_str(config.get_right_top()),
+                container.get_attribute_str(config.get_right_bottom()),
+                self.bg_color,
+                self.font_color_lt, self.bold_font_lt,
+                self.font_color_lb, self.bold_font_lb,
+                self.font_color_rt, self.bold_font_rt,
+                self.font_color_rb, self.bold_font_rb,
+                base['font'], base['bold_font'], config.get_font_size(), config.get_bold_font_size(),
+                logo_path, self.is_logo_left(),
+                container.get_ratio() >= 1,
+                config.get_font_padding_level())
+
+    def _render_strip(self, container: ImageContainer) -> Image.Image:
+        """
+        渲染高度为 NORMAL_HEIGHT 的水印条
+        :param container: 图片对象
+        :return: 水印条图片
         """
         config = self.config
-        config.bg_color = self.bg_color
 
         # 下方水印的占比
         ratio = (.04 if container.get_ratio() >= 1 else .09) + 0.02 * config.get_font_padding_level()
@@ -172,9 +268,10 @@ class WatermarkProcessor(ProcessorComponent):
         right = padding_image(right, int(max_height * padding_ratio), 't')
         right = padding_image(right, left.height - right.height, 'b')
 
-        logo = config.load_logo(container.make)
         # 动态读取配置中的 logo 开关状态
         if config.has_logo_enabled():
+            # logo 在水印条中的最终高度约为 NORMAL_HEIGHT / (1 + 2 * padding_ratio)，取最接近的预缩放版本
+            logo = config.load_logo_asset(container.make).get(int(NORMAL_HEIGHT / (1 + 2 * padding_ratio)))
             if self.is_logo_left():
                 # 如果 logo 在左边
                 line = LINE_TRANSPARENT.copy()
@@ -198,18 +295,41 @@ class WatermarkProcessor(ProcessorComponent):
             append_image_by_side(watermark, [right], side='right')
         left.close()
         right.close()
+        return watermark
 
-        # 缩放水印的大小
-        watermark = resize_image_with_width(watermark, container.get_width())
-        # 将水印图片放置在原始图片的下方
-        bg = ImageOps.expand(container.get_watermark_img().convert('RGBA'),
-                             border=(0, 0, 0, watermark.height),
-                             fill=self.bg_color)
-        fg = ImageOps.expand(watermark, border=(0, container.get_height(), 0, 0), fill=TRANSPARENT)
-        result = Image.alpha_composite(bg, fg)
-        watermark.close()
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return self._strip_key(container)
+
+    def prepare(self, container: ImageContainer) -> None:
+        # 之后的白边使用水印的背景色
+        self.config.bg_color = self.bg_color
+
+    def process(self, container: ImageContainer) -> None:
+        """
+        生成一个默认布局的水印图片
+        :param container: 图片对象
+        :return: 添加水印后的图片对象
+        """
+        self.prepare(container)
+
+        # 同一批次中相同机身、镜头、参数的图片共享同一个水印条
+        strip_key = (self._strip_key(container), container.get_width())
+        watermark = WATERMARK_STRIP_CACHE.get(strip_key)
+        if watermark is None:
+            # 缩放水印的大小
+            watermark = resize_image_with_width(self._render_strip(container), container.get_width())
+            # 只在水印条大小的区域内与背景色合成，缓存合成后的 RGB 水印条
+            watermark = Image.alpha_composite(Image.new('RGBA', watermark.size, self.bg_color), watermark)
+            watermark = watermark.convert('RGB')
+            WATERMARK_STRIP_CACHE.put(strip_key, watermark)
+        container.check_cancelled()
+
+        # 只分配一次最终的 RGB 画布，将原始图片和水印条分别粘贴到上下两部分
+        image = container.get_watermark_img()
+        result = Image.new('RGB', (image.width, image.height + watermark.height))
+        result.paste(image if image.mode == 'RGB' else image.convert('RGB'), (0, 0))
+        result.paste(watermark, (0, image.height))
         # 更新图片对象
-        result = ImageOps.exif_transpose(result).convert('RGB')
         container.update_watermark_img(result)
 
 
@@ -296,6 +416,9 @@ class MarginProcessor(ProcessorComponent):
         padding_img = padding_image(container.get_watermark_img(), padding_size, 'tlr', color=config.bg_color)
         container.update_watermark_img(padding_img)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return self.config.get_white_margin_width(), self.config.bg_color
+
 
 class SimpleProcessor(ProcessorComponent):
     LAYOUT_ID = 'simple'
@@ -340,6 +463,12 @@ class SimpleProcessor(ProcessorComponent):
         watermark_img = merge_images([container.get_watermark_img(), bg], 1, 1)
         container.update_watermark_img(watermark_img)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        base = self.config.get_data()['base']
+        return (container.get_model(), container.get_make(), container.get_param_str(),
+                base['alternative_font'], base['alternative_bold_font'],
+                self.config.get_font_size(), self.config.get_bold_font_size())
+
 
 class PaddingToOriginalRatioProcessor(ProcessorComponent):
     LAYOUT_ID = 'padding_to_original_ratio'
@@ -357,6 +486,9 @@ class PaddingToOriginalRatioProcessor(ProcessorComponent):
             padding_img = ImageOps.expand(container.get_watermark_img(), (padding_size, 0), fill='white')
         container.update_watermark_img(padding_img)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return ()
+
 
 PADDING_PERCENT_IN_BACKGROUND = 0.18
 GAUSSIAN_KERNEL_RADIUS = 35
@@ -367,17 +499,19 @@ class BackgroundBlurProcessor(ProcessorComponent):
     LAYOUT_NAME = '背景模糊'
 
     def process(self, container: ImageContainer) -> None:
-        background = container.get_watermark_img()
-        background = background.filter(ImageFilter.GaussianBlur(radius=GAUSSIAN_KERNEL_RADIUS))
-        fg = Image.new('RGB', background.size, color=(255, 255, 255))
-        background = Image.blend(background, fg, 0.1)
-        background = background.resize((int(container.get_width() * (1 + PADDING_PERCENT_IN_BACKGROUND)),
-                                        int(container.get_height() * (1 + PADDING_PERCENT_IN_BACKGROUND))))
+        radius = GAUSSIAN_KERNEL_RADIUS * container.get_scale()
+        background = blurred_background(container.get_watermark_img(), radius,
+                                        (int(container.get_width() * (1 + PADDING_PERCENT_IN_BACKGROUND)),
+                                         int(container.get_height() * (1 + PADDING_PERCENT_IN_BACKGROUND))))
+        container.check_cancelled()
         background.paste(container.get_watermark_img(),
                          (int(container.get_width() * PADDING_PERCENT_IN_BACKGROUND / 2),
                           int(container.get_height() * PADDING_PERCENT_IN_BACKGROUND / 2)))
         container.update_watermark_img(background)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return ()
+
 
 class BackgroundBlurWithWhiteBorderProcessor(ProcessorComponent):
     LAYOUT_ID = 'background_blur_with_white_border'
@@ -387,17 +521,20 @@ class BackgroundBlurWithWhiteBorderProcessor(ProcessorComponent):
         padding_size = int(
             self.config.get_white_margin_width() * min(container.get_width(), container.get_height()) / 256)
         padding_img = padding_image(container.get_watermark_img(), padding_size, 'tblr', color='white')
+        container.check_cancelled()
 
-        background = container.get_img()
-        background = background.filter(ImageFilter.GaussianBlur(radius=GAUSSIAN_KERNEL_RADIUS))
-        background = background.resize((int(padding_img.width * (1 + PADDING_PERCENT_IN_BACKGROUND)),
-                                        int(padding_img.height * (1 + PADDING_PERCENT_IN_BACKGROUND))))
-        fg = Image.new('RGB', background.size, color=(255, 255, 255))
-        background = Image.blend(background, fg, 0.1)
+        radius = GAUSSIAN_KERNEL_RADIUS * container.get_scale()
+        background = blurred_background(container.get_img(), radius,
+                                        (int(padding_img.width * (1 + PADDING_PERCENT_IN_BACKGROUND)),
+                                         int(padding_img.height * (1 + PADDING_PERCENT_IN_BACKGROUND))))
+        container.check_cancelled()
         background.paste(padding_img, (int(padding_img.width * PADDING_PERCENT_IN_BACKGROUND / 2),
                                        int(padding_img.height * PADDING_PERCENT_IN_BACKGROUND / 2)))
         container.update_watermark_img(background)
 
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return (self.config.get_white_margin_width(),)
+
 
 class PureWhiteMarginProcessor(ProcessorComponent):
     LAYOUT_ID = 'pure_white_margin'
@@ -408,3 +545,6 @@ class PureWhiteMarginProcessor(ProcessorComponent):
         padding_size = int(config.get_white_margin_width() * min(container.get_width(), container.get_height()) / 100)
         padding_img = padding_image(container.get_watermark_img(), padding_size, 'tlrb', color=config.bg_color)
         container.update_watermark_img(padding_img)
+
+    def cache_key(self, container: ImageContainer) -> tuple | None:
+        return self.config.get_white_margin_width(), self.config.bg_color
@@ -0,0 +1,58 @@
+"""
+Logo 资源缓存
+"""
+
+import threading
+
+from PIL import Image
+
+from src.utils import resize_image_with_height
+
+# 预缩放版本的最小高度
+MIN_LOGO_HEIGHT = 64
+
+
+class LogoAsset(object):
+    """
+    解码后的 logo，统一转换为 RGBA，并预先按 1/2、1/4... 缩放出一组不同高度的版本
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with Image.open(path) as logo:
+            self.image = logo.convert('RGBA')
+        # 从大到小排列的预缩放版本
+        self._levels = [self.image]
+        height = self.image.height // 2
+        while height >= MIN_LOGO_HEIGHT:
+            self._levels.append(resize_image_with_height(self._levels[-1], height, auto_close=False))
+            height //= 2
+
+    def get(self, height) -> Image.Image:
+        """
+        获取与指定高度最接近的预缩放版本，返回的图片不小于指定高度（原图更小时返回原图）
+        :param height: 期望的高度
+        :return: logo 图片，调用方不应修改或关闭它
+        """
+        for level in reversed(self._levels):
+            if level.height >= height:
+                return level
+        return self.image
+
+
+_logo_assets = {}
+_logo_assets_lock = threading.Lock()
+
+
+def load_logo_asset(path) -> LogoAsset:
+    """
+    加载 logo 资源，同一进程内每个文件只解码一次
+    :param path: logo 文件路径
+    :return: logo 资源
+    """
+    asset = _logo_assets.get(path)
+    if asset is None:
+        asset = LogoAsset(path)
+        with _logo_assets_lock:
+            asset = _logo_assets.setdefault(path, asset)
+    return asset
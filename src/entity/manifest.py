@@ -0,0 +1,123 @@
+"""
+导出清单
+
+在输出目录中记录每个输出文件对应的源文件及其大小、修改时间，以及导出时生效配置的指纹，
+增量导出时据此跳过已经是最新的文件。
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from src.entity.config import Config
+from src.entity.image_processor import RENDER_VERSION
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = '.semi-utils-manifest.json'
+MANIFEST_VERSION = 1
+# base 中影响输出的字体配置项，修改其中任意一项后已有的导出都不再是最新的
+FONT_SETTING_KEYS = ('font', 'bold_font', 'alternative_font', 'alternative_bold_font', 'font_size', 'bold_font_size')
+
+
+def config_fingerprint(config: Config) -> str:
+    """
+    计算影响输出结果的配置的指纹（布局、元素、字体、logo、全局效果、输出质量），
+    其中包含 RENDER_VERSION，升级后处理器输出变化时旧的导出不再被视为最新
+    :param config: 配置对象
+    :return: 指纹字符串
+    """
+    data = config.get_data()
+    effective = {
+        'layout': data['layout'],
+        'global': data['global'],
+        'fonts': {key: data['base'].get(key) for key in FONT_SETTING_KEYS},
+        'logo': data['logo'],
+        'quality': data['base']['quality'],
+        'render_version': RENDER_VERSION,
+    }
+    content = json.dumps(effective, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ExportManifest(object):
+    """
+    输出目录中的导出清单
+    """
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir).joinpath(MANIFEST_FILENAME)
+        self._entries = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self._entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            logger.error(f'读取导出清单失败: {self.path} : {e}')
+
+    def is_up_to_date(self, source_path: Path, target_path: Path, fingerprint: str) -> bool:
+        """
+        判断输出文件是否是最新的
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径
+        :param fingerprint: 当前配置的指纹
+        :return: 输出文件存在，且源文件和配置都未发生变化时返回 True
+        """
+        entry = self._entries.get(Path(target_path).name)
+        if entry is None or not Path(target_path).exists():
+            return False
+        try:
+            stat = Path(source_path).stat()
+        except OSError:
+            return False
+        return (entry['source'] == str(Path(source_path).resolve())
+                and entry['size'] == stat.st_size
+                and entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['fingerprint'] == fingerprint)
+
+    def split_jobs(self, jobs, fingerprint: str):
+        """
+        将任务分为需要重新导出和可以跳过的两部分
+        :param jobs: (源文件路径, 输出文件路径) 列表
+        :param fingerprint: 当前配置的指纹
+        :return: (需要导出的任务列表, 跳过的任务列表)
+        """
+        stale, skipped = [], []
+        for job in jobs:
+            (skipped if self.is_up_to_date(*job, fingerprint) else stale).append(job)
+        return stale, skipped
+
+    def record(self, source_path: Path, target_path: Path, fingerprint: str) -> None:
+        """
+        记录一次成功的导出
+        """
+        try:
+            stat = Path(source_path).stat()
+        except OSError:
+            return
+        self._entries[Path(target_path).name] = {
+            'source': str(Path(source_path).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'fingerprint': fingerprint,
+        }
+
+    def save(self) -> None:
+        """
+        写入导出清单，先写入临时文件再替换，避免中途退出导致清单损坏
+        """
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self._entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f'写入导出清单失败: {self.path} : {e}')
@@ -8,21 +8,29 @@ import os
 from pathlib import Path
 from multiprocessing import freeze_support
 
-from PySide6.QtGui import QGuiApplication, QIcon
-from PySide6.QtQml import QQmlApplicationEngine
+from src.startup import EVENT_FIRST_FRAME, STARTUP_TRACE
 
-from src.ui.backend import Backend
+with STARTUP_TRACE.span('import PySide6'):
+    from PySide6.QtGui import QGuiApplication, QIcon
+    from PySide6.QtQml import QQmlApplicationEngine
+
+with STARTUP_TRACE.span('import src.ui.backend'):
+    from src.init import setup_logging
+    from src.ui.backend import Backend
+    from src.ui.preview_provider import PREVIEW_PROVIDER_ID
+    from src.ui.thumbnail_provider import THUMBNAIL_PROVIDER_ID, ThumbnailProvider
 
 
 def guimain():
-    freeze_support()
+    setup_logging()
 
     # 设置 Qt Quick Controls 样式
     os.environ["QT_QUICK_CONTROLS_STYLE"] = "Material"
     os.environ["QT_QUICK_CONTROLS_MATERIAL_THEME"] = "Light"
     os.environ["QT_QUICK_CONTROLS_MATERIAL_ACCENT"] = "Teal"
 
-    app = QGuiApplication(sys.argv)
+    with STARTUP_TRACE.span('QGuiApplication'):
+        app = QGuiApplication(sys.argv)
     app.setApplicationName("Semi-Utils-GUI")
     app.setOrganizationName("Semi-Utils-GUI")
 
@@ -32,13 +40,19 @@ def guimain():
         app.setWindowIcon(QIcon(str(icon_path)))
 
     # 创建后端
-    backend = Backend()
+    with STARTUP_TRACE.span('Backend'):
+        backend = Backend()
 
     # 创建 QML 引擎
     engine = QQmlApplicationEngine()
 
     # 将后端暴露给 QML
     engine.rootContext().setContextProperty("backend", backend)
+    # 注册缩略图提供器，需要保持引用直到程序退出
+    thumbnail_provider = ThumbnailProvider()
+    engine.addImageProvider(THUMBNAIL_PROVIDER_ID, thumbnail_provider)
+    # 预览图片提供器由后端持有
+    engine.addImageProvider(PREVIEW_PROVIDER_ID, backend.preview_provider)
 
     # 加载 QML (支持 PyInstaller 打包)
     if getattr(sys, 'frozen', False):
@@ -48,14 +62,21 @@ def guimain():
         # 开发环境路径
         base_path = Path(__file__).parent.parent
     qml_file = base_path / "src/layout" / "main.qml"
-    engine.load(qml_file)
+    with STARTUP_TRACE.span('load QML'):
+        engine.load(qml_file)
 
     if not engine.rootObjects():
         print("Error: Failed to load QML file")
         sys.exit(-1)
+    # 窗口第一次完成渲染的时间
+    engine.rootObjects()[0].frameSwapped.connect(lambda: STARTUP_TRACE.mark(EVENT_FIRST_FRAME))
 
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    # 没有生成过预览时在退出前输出
+    STARTUP_TRACE.dump()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
+    freeze_support()
     guimain()
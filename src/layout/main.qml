@@ -259,6 +259,25 @@ ApplicationWindow {
                                     }
                                 }
 
+                                CheckBox {
+                                    id: incrementalCheckbox
+                                    text: window.tr("incremental_export")
+                                    Component.onCompleted: {
+                                        if (backend) checked = backend.incrementalEnabled
+                                    }
+                                    onToggled: {
+                                        if (backend) backend.incrementalEnabled = checked
+                                    }
+                                    Material.accent: Material.Teal
+
+                                    Connections {
+                                        target: backend
+                                        function onIncrementalEnabledChanged() {
+                                            incrementalCheckbox.checked = backend.incrementalEnabled
+                                        }
+                                    }
+                                }
+
                                 RowLayout {
                                     Layout.fillWidth: true
                                     spacing: 12
@@ -672,7 +691,16 @@ ApplicationWindow {
                                     font.bold: true
                                 }
 
-                                Item { Layout.fillWidth: true }
+                                TextField {
+                                    id: fileFilterField
+                                    Layout.fillWidth: true
+                                    placeholderText: window.tr("filter_files")
+                                    selectByMouse: true
+                                    onTextChanged: {
+                                        if (backend) backend.filterFiles(text)
+                                    }
+                                    Material.accent: Material.Teal
+                                }
 
                                 Button {
                                     text: window.tr("refresh")
@@ -715,25 +743,46 @@ ApplicationWindow {
                                 anchors.rightMargin: 16
                                 spacing: 12
 
+                                // 缩略图列
+                                Item { Layout.preferredWidth: 40 }
+
                                 Label {
-                                    text: window.tr("file_name")
+                                    text: window.tr("file_name") + fileListView.sortIndicator("name")
                                     font.pixelSize: 13
                                     font.bold: true
                                     Layout.fillWidth: true
+
+                                    MouseArea {
+                                        anchors.fill: parent
+                                        cursorShape: Qt.PointingHandCursor
+                                        onClicked: fileListView.toggleSort("name")
+                                    }
                                 }
 
                                 Label {
-                                    text: window.tr("shoot_time")
+                                    text: window.tr("shoot_time") + fileListView.sortIndicator("datetime")
                                     font.pixelSize: 13
                                     font.bold: true
+
+                                    MouseArea {
+                                        anchors.fill: parent
+                                        cursorShape: Qt.PointingHandCursor
+                                        onClicked: fileListView.toggleSort("datetime")
+                                    }
                                 }
 
                                 Label {
-                                    text: window.tr("file_size")
+                                    text: window.tr("file_size") + fileListView.sortIndicator("sizeBytes")
                                     font.pixelSize: 13
                                     font.bold: true
                                     Layout.preferredWidth: 70
                                     horizontalAlignment: Text.AlignRight
+
+                                    MouseArea {
+                                        anchors.fill: parent
+                                        cursorShape: Qt.PointingHandCursor
+                                        onClicked: fileListView.toggleSort("sizeBytes")
+                                    }
                                 }
                             }
                         }
@@ -744,9 +793,29 @@ ApplicationWindow {
                             Layout.fillWidth: true
                             Layout.fillHeight: true
                             clip: true
-                            model: backend ? backend.fileList : []
+                            model: backend ? backend.fileModel : null
                             currentIndex: backend ? backend.selectedFileIndex : -1
 
+                            // 排序字段，为空时保持原始顺序；依次点击同一表头：升序、降序、取消排序
+                            property string sortRole: ""
+                            property bool sortAscending: true
+
+                            function toggleSort(role) {
+                                if (sortRole !== role) {
+                                    sortRole = role
+                                    sortAscending = true
+                                } else if (sortAscending) {
+                                    sortAscending = false
+                                } else {
+                                    sortRole = ""
+                                }
+                                if (backend) backend.sortFiles(sortRole, sortAscending)
+                            }
+
+                            function sortIndicator(role) {
+                                return sortRole === role ? (sortAscending ? " ▲" : " ▼") : ""
+                            }
+
                             delegate: ItemDelegate {
                                 width: fileListView.width
                                 height: 48
@@ -758,21 +827,30 @@ ApplicationWindow {
                                     anchors.rightMargin: 16
                                     spacing: 12
 
+                                    Image {
+                                        Layout.preferredWidth: 40
+                                        Layout.preferredHeight: 40
+                                        source: model.thumbnail
+                                        sourceSize: Qt.size(160, 160)
+                                        fillMode: Image.PreserveAspectFit
+                                        asynchronous: true
+                                    }
+
                                     Label {
-                                        text: modelData.name || ""
+                                        text: model.name || ""
                                         font.pixelSize: 14
                                         elide: Text.ElideMiddle
                                         Layout.fillWidth: true
                                     }
 
                                     Label {
-                                        text: modelData.datetime || ""
+                                        text: model.datetime || ""
                                         color: Material.hintTextColor
                                         font.pixelSize: 13
                                     }
 
                                     Label {
-                                        text: modelData.size || ""
+                                        text: model.size || ""
                                         color: Material.hintTextColor
                                         font.pixelSize: 13
                                         Layout.preferredWidth: 70
@@ -0,0 +1,106 @@
+"""
+启动过程计时
+
+记录从启动入口开始到窗口首帧、首张预览完成的各个阶段耗时。本模块只依赖标准库，
+应当最先导入，导入时间即计时起点。
+
+设置环境变量 SEMI_UTILS_STARTUP_TRACE 后在首张预览完成时输出结果：
+值为 1 时输出到标准错误，否则作为文件路径追加写入。结果也会写入日志。
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TRACE_ENV = 'SEMI_UTILS_STARTUP_TRACE'
+
+EVENT_FIRST_FRAME = 'first frame'
+EVENT_FIRST_PREVIEW = 'first preview'
+
+
+class StartupTrace(object):
+    """
+    启动过程的计时记录
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        # [(名称, 开始时间, 耗时, 嵌套层级)]，时间相对于 origin，单位为秒，单个事件的耗时为 None
+        self.events: list[tuple[str, float, float | None, int]] = []
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._dumped = False
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        记录一个阶段的耗时，可以嵌套
+        :param name: 阶段名称，例如 "import PySide6"
+        """
+        start = time.perf_counter()
+        depth = self._depth
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth = depth
+            with self._lock:
+                self.events.append((name, start - self.origin, time.perf_counter() - start, depth))
+
+    def mark(self, name: str, once: bool = True) -> bool:
+        """
+        记录一个时间点
+        :param name: 事件名称
+        :param once: 是否只记录第一次
+        :return: 是否记录了该事件
+        """
+        with self._lock:
+            if once and any(event[0] == name for event in self.events):
+                return False
+            self.events.append((name, time.perf_counter() - self.origin, None, 0))
+        return True
+
+    def format(self) -> str:
+        """
+        生成便于阅读的计时结果，按开始时间排序
+        """
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event[1])
+        lines = ['启动计时（ms，相对于启动入口）：']
+        for name, start, duration, depth in events:
+            label = '  ' * depth + name
+            if duration is None:
+                lines.append(f'{label:<40}{start * 1000:>10.1f}')
+            else:
+                lines.append(f'{label:<40}{start * 1000:>10.1f}  +{duration * 1000:.1f}')
+        return '\n'.join(lines)
+
+    def dump(self, force: bool = False) -> None:
+        """
+        输出计时结果，默认只输出一次
+        :param force: 是否忽略已经输出过的状态
+        """
+        if self._dumped and not force:
+            return
+        self._dumped = True
+        report = self.format()
+        logger.info(report)
+        target = os.environ.get(STARTUP_TRACE_ENV)
+        if not target:
+            return
+        if target == '1':
+            print(report, file=sys.stderr)
+            return
+        try:
+            with open(target, 'a', encoding='utf-8') as f:
+                f.write(report + '\n\n')
+        except OSError as e:
+            logger.error(f'写入启动计时失败: {target} : {e}')
+
+
+STARTUP_TRACE = StartupTrace()
@@ -41,6 +41,7 @@ TRANSLATIONS = {
         "start_processing": "开始处理",
         "cancel": "取消",
         "auto_open_output": "完成后自动打开输出目录",
+        "incremental_export": "仅导出新增或修改过的照片",
         "ready": "准备就绪",
         "processing": "处理中...",
         "completed": "处理完成!",
@@ -96,6 +97,7 @@ TRANSLATIONS = {
         "file_name": "文件名",
         "shoot_time": "拍摄时间",
         "file_size": "大小",
+        "filter_files": "按文件名、相机或镜头筛选",
     },
     "en": {
         "app_title": "Semi-Utils-GUI - Image Watermark Tool",
@@ -135,6 +137,7 @@ TRANSLATIONS = {
         "start_processing": "Start",
         "cancel": "Cancel",
         "auto_open_output": "Open output folder when done",
+        "incremental_export": "Only export new or changed photos",
         "ready": "Ready",
         "processing": "Processing...",
         "completed": "Completed!",
@@ -190,5 +193,6 @@ TRANSLATIONS = {
         "file_name": "File Name",
         "shoot_time": "Shoot Time",
         "file_size": "Size",
+        "filter_files": "Filter by name, camera or lens",
     },
 }
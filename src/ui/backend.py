@@ -3,16 +3,23 @@ QML Backend 后端类
 """
 
 import os
-import tempfile
+import threading
 from pathlib import Path
 
-from PySide6.QtCore import QObject, Property, Signal, Slot, QTimer, QUrl
+from PySide6.QtCore import QObject, Property, Signal, Slot, QThread, QTimer
 
+from src.entity.config import Config
+from src.entity.manifest import config_fingerprint
 from src.init import LAYOUT_ITEMS, ITEM_LIST, config
-from src.utils import get_file_list, get_exif
+from src.startup import EVENT_FIRST_PREVIEW, STARTUP_TRACE
+from src.utils import LRUCache, get_metadata_store
+from src.ui.file_list_model import FileListModel, FileListProxyModel
 from src.translations import TRANSLATIONS
-from src.ui.constants import LAYOUT_NAME_KEYS, TEXT_ITEM_KEYS
-from src.ui.workers import PreviewWorker, ProcessWorker
+from src.ui.constants import LAYOUT_NAME_KEYS, PRERENDER_COUNT, PREVIEW_CACHE_MAX_BYTES, TEXT_ITEM_KEYS
+from src.ui.preview_provider import PreviewProvider
+from src.ui.preview_scheduler import PreviewScheduler
+from src.ui.workers import (MetadataWorker, PrerenderWorker, PreviewWorker, ProcessWorker, ScanWorker,
+                            ThumbnailWorker, preview_cache_key)
 
 
 class Backend(QObject):
@@ -32,7 +39,6 @@ class Backend(QObject):
     equivFocalEnabledChanged = Signal()
     inputDirChanged = Signal()
     outputDirChanged = Signal()
-    fileListChanged = Signal()
     fileCountChanged = Signal()
     selectedFileIndexChanged = Signal()
     previewImageChanged = Signal()
@@ -43,21 +49,37 @@ class Backend(QObject):
     processingChanged = Signal()
     processingFinished = Signal()
     autoOpenOutputChanged = Signal()
+    incrementalEnabledChanged = Signal()
     languageChanged = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._config = config
-        self._file_list = []
-        self._file_paths = []
-        self._selected_index = -1
+        # 文件列表，视图通过排序过滤模型访问
+        self._file_model = FileListModel(self)
+        self._file_proxy = FileListProxyModel(self._file_model, self)
+        self._file_model.rowsInserted.connect(self.fileCountChanged)
+        self._file_model.rowsRemoved.connect(self.fileCountChanged)
+        self._file_model.modelReset.connect(self.fileCountChanged)
+        # 排序、过滤或列表变化后，当前文件在视图中的行号可能变化
+        for signal in (self._file_proxy.layoutChanged, self._file_proxy.rowsInserted,
+                       self._file_proxy.rowsRemoved, self._file_proxy.modelReset):
+            signal.connect(self.selectedFileIndexChanged)
+        self._selected_path = None
         self._preview_image = ""
         self._preview_loading = False
         self._progress = 0
         self._processing = False
         self._auto_open_output = True
-        self._preview_worker = None
+        # 当前预览使用的配置快照，预生成相邻文件时沿用
+        self._preview_config = None
+        self._prerender_worker = None
         self._process_worker = None
+        self._scan_worker = None
+        self._thumbnail_worker = None
+        # 上一次扫描的输入目录及其快照，用于增量扫描
+        self._scan_dir = None
+        self._scan_snapshot = {}
 
         # 语言设置
         self._language = self._config.get_or_default("gui_language", "zh")
@@ -65,14 +87,16 @@ class Backend(QObject):
         self._preview_message = self._translations["select_file_preview"]
         self._progress_text = self._translations["ready"]
 
-        # 预览临时目录
-        self._preview_dir = tempfile.mkdtemp()
-        self._preview_counter = 0
+        # 预览图片提供器，需要在 QML 引擎中注册
+        self.preview_provider = PreviewProvider()
+        # 已生成的预览图，以文件和配置指纹为键
+        self._preview_cache = LRUCache(max_bytes=PREVIEW_CACHE_MAX_BYTES, sizeof=lambda image: image.sizeInBytes())
 
-        # 防抖定时器
-        self._debounce_timer = QTimer()
-        self._debounce_timer.setSingleShot(True)
-        self._debounce_timer.timeout.connect(self._do_refresh_preview)
+        # 预览调度器，负责防抖和取消过时的预览任务
+        self._preview_scheduler = PreviewScheduler(self)
+        self._preview_scheduler.triggered.connect(self._do_refresh_preview)
+        self._preview_scheduler.preview_ready.connect(self._on_preview_ready)
+        self._preview_scheduler.error.connect(self._on_preview_error)
 
         # 文字位置索引映射
         self._text_indices = {
@@ -83,6 +107,11 @@ class Backend(QObject):
         }
         self._load_text_indices()
 
+        # 在后台线程中预先解析字体，避免首次预览时等待
+        threading.Thread(target=self._config.preload_fonts, daemon=True).start()
+        # 在后台线程中清理已失效的元数据缓存
+        threading.Thread(target=get_metadata_store().evict_stale, daemon=True).start()
+
         # 启动时自动刷新文件列表
         QTimer.singleShot(100, self.refreshFileList)
 
@@ -283,107 +312,167 @@ class Backend(QObject):
         self.outputDirChanged.emit()
 
     # ===== 文件列表 =====
-    @Property(list, notify=fileListChanged)
-    def fileList(self):
-        return self._file_list
+    @Property(QObject, constant=True)
+    def fileModel(self):
+        return self._file_proxy
 
     @Property(int, notify=fileCountChanged)
     def fileCount(self):
-        return len(self._file_paths)
+        return len(self._file_model)
 
     @Property(int, notify=selectedFileIndexChanged)
     def selectedFileIndex(self):
-        return self._selected_index
+        """当前选择的文件在列表视图（排序、过滤后）中的行号"""
+        if self._selected_path is None:
+            return -1
+        return self._file_proxy.view_row(self._file_model.row_of(self._selected_path))
 
     @selectedFileIndex.setter
     def selectedFileIndex(self, index):
-        if index != self._selected_index and 0 <= index < len(self._file_paths):
-            self._selected_index = index
-            self.selectedFileIndexChanged.emit()
+        path = self._file_model.path_at(self._file_proxy.source_row(index))
+        if path is not None and path != self._selected_path:
+            self._select_file(path)
+
+    def _select_file(self, path: Path | None):
+        """选择文件并刷新预览，已有预生成的预览时直接显示"""
+        self._selected_path = path
+        self.selectedFileIndexChanged.emit()
+        if path is None:
+            return
+        config = Config.from_snapshot(self._config.snapshot())
+        if self._show_cached_preview(path, config):
+            self._preview_scheduler.stop()
+        else:
             self._schedule_preview_refresh()
 
-    def _get_file_info(self, file_path: Path) -> dict:
-        """获取文件信息（名称、拍摄时间、大小）"""
-        info = {
-            "name": file_path.name,
-            "datetime": "",
-            "size": ""
-        }
-        try:
-            # 获取文件大小
-            size_bytes = file_path.stat().st_size
-            if size_bytes < 1024:
-                info["size"] = f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                info["size"] = f"{size_bytes / 1024:.1f} KB"
-            else:
-                info["size"] = f"{size_bytes / (1024 * 1024):.1f} MB"
-
-            # 获取拍摄时间
-            exif = get_exif(str(file_path))
-            if "DateTimeOriginal" in exif:
-                dt_str = exif["DateTimeOriginal"]
-                # 格式: "2023:01:01 12:00:00" -> "2023-01-01 12:00"
-                if len(dt_str) >= 16:
-                    info["datetime"] = dt_str[:10].replace(":", "-") + " " + dt_str[11:16]
-        except Exception:
-            pass
-        return info
+    def _select_first_file(self):
+        """选择列表视图中的第一个文件"""
+        self._select_file(self._file_model.path_at(self._file_proxy.source_row(0)))
+
+    @Slot(str, bool)
+    def sortFiles(self, role_name, ascending):
+        """
+        按指定字段排序文件列表
+        :param role_name: 字段名称，如 "name"、"datetime"、"sizeBytes"，为空时恢复原始顺序
+        :param ascending: 是否升序
+        """
+        self._file_model.sort_by(self._file_model.role_of(role_name), ascending)
+
+    @Slot(str)
+    def filterFiles(self, text):
+        """按文件名、相机、镜头过滤文件列表"""
+        self._file_proxy.setFilterFixedString(text)
 
     @Slot()
     def refreshFileList(self):
-        """刷新文件列表"""
+        """刷新文件列表，在后台线程中扫描输入目录，只读取新增和修改过的文件"""
+        if self._scan_worker is not None:
+            self._scan_worker.cancel()
+            self._scan_worker = None
+
         input_dir = self._config.get_input_dir()
-        if os.path.exists(input_dir):
-            self._file_paths = get_file_list(input_dir)
-            self._file_list = [self._get_file_info(p) for p in self._file_paths]
-        else:
-            self._file_paths = []
-            self._file_list = []
+        if input_dir != self._scan_dir or not os.path.exists(input_dir):
+            # 输入目录发生变化时重新建立列表
+            self._scan_dir = input_dir
+            self._scan_snapshot = {}
+            self._file_model.clear()
+            self._select_file(None)
+
+        if not os.path.exists(input_dir):
+            self._preview_message = self._translations["select_file_preview"]
+            self.previewMessageChanged.emit()
+            return
 
-        self.fileListChanged.emit()
-        self.fileCountChanged.emit()
+        # 由 Qt 管理工作线程的生命周期，被取消的扫描可以在后台自然结束
+        self._scan_worker = ScanWorker(input_dir, dict(self._scan_snapshot), parent=self)
+        self._scan_worker.finished.connect(self._scan_worker.deleteLater)
+        self._scan_worker.files_found.connect(self._on_scan_files_found)
+        self._scan_worker.files_removed.connect(self._on_scan_files_removed)
+        self._scan_worker.scan_finished.connect(self._on_scan_finished)
+        self._scan_worker.error.connect(self._on_scan_error)
+        self._scan_worker.start()
+
+    def _on_scan_files_found(self, worker, entries):
+        """扫描到一批新增或修改过的文件"""
+        if worker is not self._scan_worker:
+            return
+        self._file_model.update(entries)
 
         # 自动选择第一个文件
-        if self._file_paths:
-            self._selected_index = 0
-            self.selectedFileIndexChanged.emit()
-            self._schedule_preview_refresh()
-        else:
-            self._selected_index = -1
-            self.selectedFileIndexChanged.emit()
+        if self._selected_path is None:
+            self._select_first_file()
+
+    def _on_scan_files_removed(self, worker, paths):
+        """扫描发现已删除的文件"""
+        if worker is not self._scan_worker:
+            return
+        self._file_model.remove(paths)
+
+        # 原来选择的文件被删除时选择第一个文件
+        if self._selected_path is not None and self._selected_path not in self._file_model:
+            self._select_first_file()
+
+    def _on_scan_finished(self, worker, snapshot):
+        """扫描完成"""
+        if worker is not self._scan_worker:
+            return
+        self._scan_snapshot = snapshot
+        self._scan_worker = None
+        self._prefetch_thumbnails(self._file_model.paths())
+        if not len(self._file_model):
             self._preview_message = self._translations["select_file_preview"]
             self.previewMessageChanged.emit()
 
+    def _on_scan_error(self, worker, error_msg):
+        """扫描错误"""
+        if worker is not self._scan_worker:
+            return
+        self._scan_worker = None
+        self._preview_message = error_msg
+        self.previewMessageChanged.emit()
+
     @Slot(list)
     def addFiles(self, paths):
-        """添加文件"""
-        for path in paths:
-            p = Path(path)
-            if p not in self._file_paths:
-                self._file_paths.append(p)
-                self._file_list.append(self._get_file_info(p))
+        """添加文件，EXIF 信息在后台线程中读取"""
+        added = self._file_model.add(Path(path) for path in paths)
+        if not added:
+            return
 
-        self.fileListChanged.emit()
-        self.fileCountChanged.emit()
+        worker = MetadataWorker(added, parent=self)
+        worker.finished.connect(worker.deleteLater)
+        worker.metadata_loaded.connect(self._on_metadata_loaded)
+        worker.start()
+        self._prefetch_thumbnails(added)
 
         # 如果是第一次添加，自动选择
-        if len(paths) > 0 and self._selected_index < 0:
-            self._selected_index = 0
-            self.selectedFileIndexChanged.emit()
-            self._schedule_preview_refresh()
+        if self._selected_path is None:
+            self._select_first_file()
+
+    def _prefetch_thumbnails(self, paths):
+        """在后台以低优先级预先生成缩略图"""
+        if self._thumbnail_worker is not None:
+            self._thumbnail_worker.cancel()
+        self._thumbnail_worker = ThumbnailWorker(paths, parent=self)
+        self._thumbnail_worker.finished.connect(self._thumbnail_worker.deleteLater)
+        self._thumbnail_worker.start(QThread.LowPriority)
+
+    def _on_metadata_loaded(self, worker, entries):
+        """手动添加的文件读取到 EXIF 信息，只更新仍在列表中的文件"""
+        self._file_model.update([(path, exif) for path, exif in entries if path in self._file_model])
 
     @Slot()
     def clearFileList(self):
         """清空文件列表"""
-        self._file_paths = []
-        self._file_list = []
-        self._selected_index = -1
+        if self._scan_worker is not None:
+            self._scan_worker.cancel()
+            self._scan_worker = None
+        self._scan_snapshot = {}
+        self._file_model.clear()
+        self._selected_path = None
         self._preview_image = ""
+        self.preview_provider.clear()
         self._preview_message = self._translations["select_file_preview"]
 
-        self.fileListChanged.emit()
-        self.fileCountChanged.emit()
         self.selectedFileIndexChanged.emit()
         self.previewImageChanged.emit()
         self.previewMessageChanged.emit()
@@ -402,25 +491,25 @@ class Backend(QObject):
         return self._preview_message
 
     def _schedule_preview_refresh(self):
-        """调度预览刷新（防抖）"""
-        self._debounce_timer.stop()
-        self._debounce_timer.start(300)
+        """调度预览刷新（防抖），同时停止预生成，其配置可能已经过时"""
+        self._cancel_prerender()
+        self._preview_scheduler.schedule()
 
     def _do_refresh_preview(self):
         """实际执行预览刷新"""
-        if self._selected_index < 0 or self._selected_index >= len(self._file_paths):
+        if self._selected_path is None:
             return
 
-        file_path = str(self._file_paths[self._selected_index])
+        file_path = str(self._selected_path)
         if not os.path.exists(file_path):
             self._preview_message = self._translations["file_not_exist"]
             self.previewMessageChanged.emit()
             return
 
-        # 取消之前的预览任务
-        if self._preview_worker and self._preview_worker.isRunning():
-            self._preview_worker.cancel()
-            self._preview_worker.wait(1000)
+        # 处理时修改配置中的状态，使用快照，预览图与缓存键中的配置指纹保持一致
+        config = Config.from_snapshot(self._config.snapshot())
+        if self._show_cached_preview(file_path, config):
+            return
 
         # 设置加载状态
         self._preview_loading = True
@@ -428,31 +517,81 @@ class Backend(QObject):
         self.previewLoadingChanged.emit()
         self.previewMessageChanged.emit()
 
-        # 生成新的预览文件名
-        self._preview_counter += 1
-        preview_path = os.path.join(
-            self._preview_dir, f"preview_{self._preview_counter}.jpg"
-        )
-
-        # 启动预览工作线程
-        self._preview_worker = PreviewWorker(file_path, self._config, preview_path)
-        self._preview_worker.preview_ready.connect(self._on_preview_ready)
-        self._preview_worker.error.connect(self._on_preview_error)
-        self._preview_worker.start()
+        # 启动预览工作线程，之前的预览任务被取消
+        self._preview_config = config
+        self._preview_scheduler.start(PreviewWorker(file_path, config, self._preview_cache,
+                                                    preview_cache_key(file_path, config_fingerprint(config))))
+
+    def _show_cached_preview(self, file_path, config) -> bool:
+        """
+        显示缓存中的预览图
+        :param file_path: 图片路径
+        :param config: 配置快照创建的配置对象
+        :return: 缓存中是否有该预览图
+        """
+        cache_key = preview_cache_key(file_path, config_fingerprint(config))
+        image = self._preview_cache.get(cache_key) if cache_key is not None else None
+        if image is None:
+            return False
+        # 之前的预览已经过时
+        self._preview_scheduler.cancel()
+        self._preview_config = config
+        self._on_preview_ready(image)
+        return True
+
+    def _neighbour_paths(self) -> list[Path]:
+        """
+        获取列表视图中当前文件前后各 PRERENDER_COUNT 个文件，由近及远、先后再前排列
+        """
+        row = self.selectedFileIndex
+        if row < 0:
+            return []
+        paths = []
+        for distance in range(1, PRERENDER_COUNT + 1):
+            for neighbour in (row + distance, row - distance):
+                path = self._file_model.path_at(self._file_proxy.source_row(neighbour))
+                if path is not None:
+                    paths.append(path)
+        return paths
+
+    def _start_prerender(self):
+        """在 CPU 空闲时以当前预览的配置预生成相邻文件的预览"""
+        self._cancel_prerender()
+        # 批量处理时不占用 CPU，配置已变化、等待刷新时不再使用旧的配置
+        if self._processing or self._preview_scheduler.is_pending():
+            return
+        paths = self._neighbour_paths()
+        if not paths:
+            return
+        # 已取消的线程可能仍在生成，每个线程使用各自的配置对象
+        config = Config.from_snapshot(self._preview_config.get_data())
+        self._prerender_worker = PrerenderWorker(paths, config, config_fingerprint(config), self._preview_cache,
+                                                 parent=self)
+        self._prerender_worker.finished.connect(self._prerender_worker.deleteLater)
+        self._prerender_worker.start(QThread.LowestPriority)
+
+    def _cancel_prerender(self):
+        """停止预生成，正在生成的预览完成后线程退出"""
+        if self._prerender_worker is not None:
+            self._prerender_worker.cancel()
+            self._prerender_worker = None
 
     @Slot()
     def refreshPreview(self):
         """手动刷新预览"""
         self._schedule_preview_refresh()
 
-    def _on_preview_ready(self, path):
+    def _on_preview_ready(self, image):
         """预览生成完成"""
         self._preview_loading = False
-        self._preview_image = QUrl.fromLocalFile(path).toString()
+        self._preview_image = self.preview_provider.publish(image)
         self._preview_message = ""
         self.previewLoadingChanged.emit()
         self.previewImageChanged.emit()
         self.previewMessageChanged.emit()
+        if STARTUP_TRACE.mark(EVENT_FIRST_PREVIEW):
+            STARTUP_TRACE.dump()
+        self._start_prerender()
 
     def _on_preview_error(self, error_msg):
         """预览生成错误"""
@@ -484,6 +623,18 @@ class Backend(QObject):
             self._auto_open_output = value
             self.autoOpenOutputChanged.emit()
 
+    @Property(bool, notify=incrementalEnabledChanged)
+    def incrementalEnabled(self):
+        return self._config.has_incremental_enabled()
+
+    @incrementalEnabled.setter
+    def incrementalEnabled(self, enabled):
+        if enabled:
+            self._config.enable_incremental()
+        else:
+            self._config.disable_incremental()
+        self.incrementalEnabledChanged.emit()
+
     # ===== 语言设置 =====
     @Property(list, constant=True)
     def languageOptions(self):
@@ -516,7 +667,7 @@ class Backend(QObject):
         if not self._processing:
             self._progress_text = self._translations["ready"]
             self.progressTextChanged.emit()
-        if self._selected_index < 0:
+        if self._selected_path is None:
             self._preview_message = self._translations["select_file_preview"]
             self.previewMessageChanged.emit()
 
@@ -538,12 +689,14 @@ class Backend(QObject):
         self.whiteMarginEnabledChanged.emit()
         self.paddingRatioEnabledChanged.emit()
         self.equivFocalEnabledChanged.emit()
+        self.incrementalEnabledChanged.emit()
 
     @Slot()
     def startProcessing(self):
         """开始处理"""
-        if not self._file_paths:
+        if not len(self._file_model):
             return
+        self._cancel_prerender()
 
         output_dir = self._config.get_output_dir()
         os.makedirs(output_dir, exist_ok=True)
@@ -555,7 +708,7 @@ class Backend(QObject):
         self.progressChanged.emit()
         self.progressTextChanged.emit()
 
-        self._process_worker = ProcessWorker(self._file_paths, self._config)
+        self._process_worker = ProcessWorker(self._file_model.paths(), self._config)
         self._process_worker.progress.connect(self._on_process_progress)
         self._process_worker.finished.connect(self._on_process_finished)
         self._process_worker.error.connect(self._on_process_error)
@@ -2,6 +2,23 @@
 UI 相关的常量定义
 """
 
+# 预览图长边的最大尺寸，预览图以该分辨率解码和渲染
+PREVIEW_SIZE = 1600
+# 预览刷新的初始防抖间隔（毫秒），之后随渲染耗时在最小值和最大值之间调整
+PREVIEW_DEBOUNCE_MS = 300
+PREVIEW_DEBOUNCE_MIN_MS = 40
+PREVIEW_DEBOUNCE_MAX_MS = 400
+# 连续修改设置时，距离第一次修改最多等待多久刷新预览（毫秒）
+PREVIEW_MAX_DELAY_MS = 1000
+
+# 预览显示后在后台预生成前后各多少个文件的预览
+PRERENDER_COUNT = 3
+# 预览图缓存的最大占用，长边 1600 的预览图约占 5~8 MB
+PREVIEW_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# 扫描输入目录时每批读取元数据并加入列表的文件数量
+SCAN_BATCH_SIZE = 200
+
 # 布局名称到翻译 key 的映射
 LAYOUT_NAME_KEYS = {
     "normal(Logo 居右)": "layout_normal_right",
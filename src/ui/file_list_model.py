@@ -0,0 +1,311 @@
+"""
+文件列表模型
+"""
+
+from pathlib import Path
+
+from PySide6.QtCore import QAbstractListModel, QByteArray, QModelIndex, QSortFilterProxyModel, Qt
+
+from src.ui.thumbnail_provider import thumbnail_url
+
+
+class FileEntry(object):
+    """
+    文件列表中的一项，除路径以外的信息都在首次使用时才计算
+    """
+
+    __slots__ = ('path', 'exif', 'seq', '_size', '_mtime_ns', '_datetime')
+
+    def __init__(self, path: Path, exif: dict | None = None, seq: int = 0):
+        """
+        :param path: 文件路径
+        :param exif: EXIF 信息，为 None 时表示尚未读取
+        :param seq: 加入列表的顺序，用于恢复原始顺序
+        """
+        self.path = path
+        self.exif = exif
+        self.seq = seq
+        self._size = None
+        self._mtime_ns = None
+        self._datetime = None
+
+    def set_exif(self, exif: dict) -> None:
+        self.exif = exif
+        self._datetime = None
+        # 文件可能已被修改，重新读取大小和修改时间
+        self._size = None
+        self._mtime_ns = None
+
+    def get_size(self) -> int:
+        """
+        获取文件大小
+        :return: 字节数，文件不存在时返回 -1
+        """
+        if self._size is None:
+            self._read_stat()
+        return self._size
+
+    def get_version(self) -> str:
+        """
+        获取文件版本，文件被修改后版本随之变化
+        :return: "文件大小-修改时间"
+        """
+        if self._size is None:
+            self._read_stat()
+        return f"{self._size}-{self._mtime_ns}"
+
+    def _read_stat(self) -> None:
+        try:
+            stat = self.path.stat()
+            self._size, self._mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            self._size, self._mtime_ns = -1, 0
+
+    def get_size_text(self) -> str:
+        size_bytes = self.get_size()
+        if size_bytes < 0:
+            return ""
+        if size_bytes < 1024:
+            return f"{size_bytes} B"
+        elif size_bytes < 1024 * 1024:
+            return f"{size_bytes / 1024:.1f} KB"
+        else:
+            return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+    def get_datetime(self) -> str:
+        """
+        获取拍摄时间，格式: "2023:01:01 12:00:00" -> "2023-01-01 12:00"
+        """
+        if self.exif is None:
+            return ""
+        if self._datetime is None:
+            dt_str = self.exif.get("DateTimeOriginal", "")
+            self._datetime = dt_str[:10].replace(":", "-") + " " + dt_str[11:16] if len(dt_str) >= 16 else ""
+        return self._datetime
+
+    def get_exif_value(self, key) -> str:
+        return self.exif.get(key, "") if self.exif is not None else ""
+
+
+class FileListModel(QAbstractListModel):
+    """文件列表模型，以路径为键去重"""
+
+    # 角色使用普通整数，比较时不需要经过枚举转换
+    NameRole = int(Qt.UserRole) + 1
+    PathRole = int(Qt.UserRole) + 2
+    DatetimeRole = int(Qt.UserRole) + 3
+    SizeRole = int(Qt.UserRole) + 4
+    SizeBytesRole = int(Qt.UserRole) + 5
+    MakeRole = int(Qt.UserRole) + 6
+    ModelRole = int(Qt.UserRole) + 7
+    LensRole = int(Qt.UserRole) + 8
+    # 文件名与相机、镜头信息的组合，用于过滤
+    SearchRole = int(Qt.UserRole) + 9
+    ThumbnailRole = int(Qt.UserRole) + 10
+
+    ROLE_NAMES = {
+        NameRole: b"name",
+        PathRole: b"path",
+        DatetimeRole: b"datetime",
+        SizeRole: b"size",
+        SizeBytesRole: b"sizeBytes",
+        MakeRole: b"cameraMake",
+        # 不能命名为 model，否则会覆盖 QML 委托中的 model 对象
+        ModelRole: b"cameraModel",
+        LensRole: b"lens",
+        SearchRole: b"search",
+        ThumbnailRole: b"thumbnail",
+    }
+
+    # 各角色的取值方法，只在视图或排序需要时调用
+    ROLE_GETTERS = {
+        int(Qt.DisplayRole): lambda entry: entry.path.name,
+        NameRole: lambda entry: entry.path.name,
+        PathRole: lambda entry: str(entry.path),
+        DatetimeRole: FileEntry.get_datetime,
+        SizeRole: FileEntry.get_size_text,
+        SizeBytesRole: FileEntry.get_size,
+        MakeRole: lambda entry: entry.get_exif_value("Make"),
+        ModelRole: lambda entry: entry.get_exif_value("CameraModelName"),
+        LensRole: lambda entry: entry.get_exif_value("LensModel"),
+        SearchRole: lambda entry: " ".join([entry.path.name, entry.get_exif_value("Make"),
+                                            entry.get_exif_value("CameraModelName"),
+                                            entry.get_exif_value("LensModel")]),
+        ThumbnailRole: lambda entry: thumbnail_url(entry.path, entry.get_version()),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries: list[FileEntry] = []
+        # 路径到行号的索引
+        self._index: dict[Path, int] = {}
+        self._next_seq = 0
+        # 排序角色，为 -1 时保持加入列表的顺序
+        self._sort_role = -1
+        self._sort_ascending = True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def roleNames(self):
+        return {role: QByteArray(name) for role, name in self.ROLE_NAMES.items()}
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._entries):
+            return None
+        getter = self.ROLE_GETTERS.get(int(role))
+        return getter(self._entries[index.row()]) if getter is not None else None
+
+    def role_of(self, name: str) -> int:
+        """
+        根据角色名称获取角色
+        :param name: 角色名称，如 "datetime"
+        :return: 角色，不存在时返回 -1
+        """
+        for role, role_name in self.ROLE_NAMES.items():
+            if role_name.decode() == name:
+                return role
+        return -1
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def paths(self) -> list[Path]:
+        return [entry.path for entry in self._entries]
+
+    def path_at(self, row: int) -> Path | None:
+        return self._entries[row].path if 0 <= row < len(self._entries) else None
+
+    def row_of(self, path: Path) -> int:
+        return self._index.get(path, -1)
+
+    def add(self, paths) -> list[Path]:
+        """
+        添加文件，已存在的文件会被忽略
+        :param paths: 文件路径列表
+        :return: 实际添加的文件路径列表
+        """
+        added = {path: None for path in paths if path not in self._index}
+        self._append([self._new_entry(path) for path in added])
+        return list(added)
+
+    def update(self, entries) -> None:
+        """
+        更新文件的 EXIF 信息，不存在的文件会被添加到末尾
+        :param entries: [(文件路径, exif)] 列表
+        """
+        new_entries = {}
+        first, last = len(self._entries), -1
+        for path, exif in entries:
+            row = self._index.get(path)
+            if row is None:
+                new_entries[path] = self._new_entry(path, exif)
+                continue
+            self._entries[row].set_exif(exif)
+            first, last = min(first, row), max(last, row)
+        if last >= 0:
+            self.dataChanged.emit(self.index(first), self.index(last))
+            if self._sort_role >= 0:
+                self._sort()
+        self._append(list(new_entries.values()))
+
+    def remove(self, paths) -> None:
+        """
+        移除文件
+        :param paths: 文件路径列表
+        """
+        rows = sorted({self._index[path] for path in paths if path in self._index}, reverse=True)
+        # 从后往前按连续区间移除
+        i = 0
+        while i < len(rows):
+            last = rows[i]
+            while i + 1 < len(rows) and rows[i + 1] == rows[i] - 1:
+                i += 1
+            first = rows[i]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._entries[first:last + 1]
+            self.endRemoveRows()
+            i += 1
+        if rows:
+            self._index = {entry.path: row for row, entry in enumerate(self._entries)}
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._entries = []
+        self._index = {}
+        self.endResetModel()
+
+    def sort_by(self, role: int, ascending: bool = True) -> None:
+        """
+        排序文件列表，之后加入或更新的文件也会保持该顺序
+        :param role: 排序角色，为 -1 时恢复加入列表的顺序
+        :param ascending: 是否升序
+        """
+        self._sort_role = role
+        self._sort_ascending = ascending
+        self._sort()
+
+    def _sort(self) -> None:
+        # 在 Python 中一次完成排序，而不是由 QSortFilterProxyModel 逐次回调比较，数万个文件时也很快
+        self.layoutAboutToBeChanged.emit()
+        old_paths = [entry.path for entry in self._entries]
+        self._entries.sort(key=lambda entry: entry.seq)
+        if self._sort_role >= 0:
+            getter = self.ROLE_GETTERS[self._sort_role]
+
+            def sort_key(entry):
+                value = getter(entry)
+                return value.lower() if isinstance(value, str) else value
+
+            self._entries.sort(key=sort_key, reverse=not self._sort_ascending)
+        self._index = {entry.path: row for row, entry in enumerate(self._entries)}
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(self._index[old_paths[index.row()]])
+                                                    for index in persistent])
+        self.layoutChanged.emit()
+
+    def _new_entry(self, path: Path, exif: dict | None = None) -> FileEntry:
+        self._next_seq += 1
+        return FileEntry(path, exif, self._next_seq)
+
+    def _append(self, entries) -> None:
+        if not entries:
+            return
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for row, entry in enumerate(entries, first):
+            self._entries.append(entry)
+            self._index[entry.path] = row
+        self.endInsertRows()
+        if self._sort_role >= 0:
+            self._sort()
+
+
+class FileListProxyModel(QSortFilterProxyModel):
+    """文件列表的过滤，不复制源模型中的数据，排序由 FileListModel 完成"""
+
+    def __init__(self, source: FileListModel, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.setFilterRole(FileListModel.SearchRole)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setDynamicSortFilter(True)
+
+    def source_row(self, row: int) -> int:
+        """
+        将视图中的行号转换为源模型中的行号
+        """
+        if not 0 <= row < self.rowCount():
+            return -1
+        return self.mapToSource(self.index(row, 0)).row()
+
+    def view_row(self, source_row: int) -> int:
+        """
+        将源模型中的行号转换为视图中的行号，被过滤掉时返回 -1
+        """
+        if source_row < 0:
+            return -1
+        return self.mapFromSource(self.sourceModel().index(source_row, 0)).row()
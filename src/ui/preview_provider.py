@@ -0,0 +1,62 @@
+"""
+预览图片提供器
+"""
+
+import threading
+
+from PIL import Image
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickImageProvider
+
+PREVIEW_PROVIDER_ID = "preview"
+# 保留最近几张预览图，QML 可能在新的预览图替换旧的之后才请求旧的地址
+PREVIEW_KEEP_COUNT = 2
+
+
+def pil_to_qimage(image: Image.Image) -> QImage:
+    """
+    将 PIL 图片转换为 QImage，可在工作线程中调用
+    :param image: 图片对象
+    :return: 不引用原图片数据的 QImage
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    data = image.tobytes()
+    # QImage 直接使用 data 的内存，复制后才与 data 无关
+    return QImage(data, image.width, image.height, image.width * 3, QImage.Format.Format_RGB888).copy()
+
+
+class PreviewProvider(QQuickImageProvider):
+    """将内存中的预览图直接提供给 QML，不经过编码和磁盘文件"""
+
+    def __init__(self):
+        super().__init__(QQuickImageProvider.ImageType.Image)
+        self._lock = threading.Lock()
+        # 编号 -> 预览图，按加入顺序排列
+        self._images: dict[int, QImage] = {}
+        self._next_id = 0
+
+    def publish(self, image: QImage) -> str:
+        """
+        发布新的预览图
+        :param image: 预览图
+        :return: image://preview/... 地址，每次发布的地址都不同，QML 会重新加载
+        """
+        with self._lock:
+            self._next_id += 1
+            self._images[self._next_id] = image
+            for image_id in list(self._images)[:-PREVIEW_KEEP_COUNT]:
+                del self._images[image_id]
+            return f"image://{PREVIEW_PROVIDER_ID}/{self._next_id}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+
+    def requestImage(self, id, size, requested_size):
+        try:
+            image_id = int(id)
+        except ValueError:
+            return QImage()
+        with self._lock:
+            return self._images.get(image_id, QImage())
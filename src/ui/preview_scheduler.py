@@ -0,0 +1,108 @@
+"""
+预览调度器
+"""
+
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QImage
+
+from src.ui.constants import PREVIEW_DEBOUNCE_MAX_MS
+from src.ui.constants import PREVIEW_DEBOUNCE_MIN_MS
+from src.ui.constants import PREVIEW_DEBOUNCE_MS
+from src.ui.constants import PREVIEW_MAX_DELAY_MS
+
+# 渲染耗时移动平均中最新一次的权重
+RENDER_TIME_WEIGHT = 0.3
+
+
+class PreviewScheduler(QObject):
+    """
+    合并连续的预览刷新请求，只保留最新的预览任务，不在界面线程中等待工作线程
+
+    防抖间隔随实际渲染耗时调整：渲染快时尽快刷新，渲染慢时多等一会，把连续的修改合并为一次渲染
+    """
+
+    triggered = Signal()  # 防抖结束，应当开始生成预览
+    preview_ready = Signal(QImage)  # 当前任务的预览图片
+    error = Signal(str)  # 当前任务的错误信息
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.triggered)
+        self._interval = PREVIEW_DEBOUNCE_MS
+        # 渲染耗时（毫秒）的指数移动平均，初始值与初始防抖间隔对应，首次渲染需要加载字体、解码原图，耗时偏长
+        self._render_ms = PREVIEW_DEBOUNCE_MS * 2
+        # 本轮连续请求中第一次请求的时间
+        self._burst_start = 0.0
+        self._worker = None
+
+    @property
+    def interval(self) -> int:
+        """当前的防抖间隔（毫秒）"""
+        return self._interval
+
+    def schedule(self) -> None:
+        """
+        请求刷新预览，间隔内的多次请求只触发一次
+        连续请求时不断推迟，但距离第一次请求不超过 PREVIEW_MAX_DELAY_MS，拖动滑块时预览也会更新
+        """
+        now = time.perf_counter()
+        if not self._timer.isActive():
+            self._burst_start = now
+        remaining = PREVIEW_MAX_DELAY_MS - (now - self._burst_start) * 1000
+        self._timer.start(int(max(0, min(self._interval, remaining))))
+
+    def is_pending(self) -> bool:
+        """是否有尚未触发的刷新请求"""
+        return self._timer.isActive()
+
+    def stop(self) -> None:
+        """放弃尚未触发的刷新请求"""
+        self._timer.stop()
+
+    def start(self, worker) -> None:
+        """
+        启动预览任务，之前的任务被取消，不等待其结束
+        :param worker: PreviewWorker，结束后由调度器释放
+        """
+        self.cancel()
+        worker.setParent(self)
+        worker.preview_ready.connect(self._on_preview_ready)
+        worker.error.connect(self._on_error)
+        worker.finished.connect(self._on_finished)
+        self._worker = worker
+        worker.start()
+
+    def cancel(self) -> None:
+        """取消当前的预览任务，工作线程在下一个检查点退出"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def _on_preview_ready(self, image):
+        # 已取消的任务在取消之前可能已经发出了信号
+        if self.sender() is self._worker:
+            self.preview_ready.emit(image)
+
+    def _on_error(self, error_msg):
+        if self.sender() is self._worker:
+            self.error.emit(error_msg)
+
+    def _on_finished(self):
+        worker = self.sender()
+        if worker is self._worker:
+            self._worker = None
+        if worker.elapsed is not None:
+            self._record_render_time(worker.elapsed * 1000)
+        worker.deleteLater()
+
+    def _record_render_time(self, render_ms: float) -> None:
+        """
+        根据渲染耗时调整防抖间隔，取平均耗时的一半并限制在 [PREVIEW_DEBOUNCE_MIN_MS, PREVIEW_DEBOUNCE_MAX_MS]
+        :param render_ms: 一次完整渲染的耗时（毫秒）
+        """
+        self._render_ms += RENDER_TIME_WEIGHT * (render_ms - self._render_ms)
+        self._interval = int(min(max(self._render_ms / 2, PREVIEW_DEBOUNCE_MIN_MS), PREVIEW_DEBOUNCE_MAX_MS))
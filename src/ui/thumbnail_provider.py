@@ -0,0 +1,38 @@
+"""
+缩略图图片提供器
+"""
+
+from urllib.parse import quote, unquote
+
+from PySide6.QtGui import QImage
+from PySide6.QtQml import QQmlImageProviderBase
+from PySide6.QtQuick import QQuickImageProvider
+
+from src.utils import get_thumbnail_cache
+
+THUMBNAIL_PROVIDER_ID = "thumbnails"
+
+
+def thumbnail_url(path, version: str | None = None) -> str:
+    """
+    获取文件缩略图在 QML 中使用的地址
+    :param path: 图片路径
+    :param version: 文件版本，作为查询参数写入地址，文件被修改后地址不同，QML 不会使用缓存中的旧缩略图
+    :return: image://thumbnails/...?v=... 地址
+    """
+    url = f"image://{THUMBNAIL_PROVIDER_ID}/{quote(str(path))}"
+    return f"{url}?v={quote(version)}" if version is not None else url
+
+
+class ThumbnailProvider(QQuickImageProvider):
+    """从缩略图磁盘缓存中加载缩略图，在 QML 的加载线程中执行"""
+
+    def __init__(self):
+        super().__init__(QQuickImageProvider.ImageType.Image,
+                         QQmlImageProviderBase.Flag.ForceAsynchronousImageLoading)
+
+    def requestImage(self, id, size, requested_size):
+        # 路径中的 ? 已被转义，第一个 ? 之后是版本参数
+        path = unquote(id.split('?', 1)[0])
+        cache_path = get_thumbnail_cache().get(path)
+        return QImage(str(cache_path)) if cache_path is not None else QImage()
@@ -3,96 +3,152 @@
 """
 
 import logging
+import os
+import threading
+import time
 from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage
 
+from src.entity.batch import BatchExecutor
+from src.entity.batch import build_processor_chain
 from src.entity.image_container import ImageContainer
-from src.entity.image_processor import ProcessorChain
-from src.init import (
-    layout_items_dict,
-    SHADOW_PROCESSOR,
-    MARGIN_PROCESSOR,
-    PADDING_TO_ORIGINAL_RATIO_PROCESSOR,
-    SIMPLE_PROCESSOR,
-)
+from src.entity.image_container import RenderCancelled
+from src.entity.image_processor import STAGE_CACHE
+from src.entity.manifest import ExportManifest
+from src.entity.manifest import config_fingerprint
+from src.ui.constants import PREVIEW_SIZE
+from src.ui.constants import SCAN_BATCH_SIZE
+from src.ui.preview_provider import pil_to_qimage
+from src.utils import diff_file_stats
+from src.utils import get_metadata_store
+from src.utils import get_thumbnail_cache
+from src.utils import scan_file_stats
+from src.utils import StageProfile
+
+logger = logging.getLogger(__name__)
+
+
+def preview_cache_key(file_path, fingerprint: str) -> tuple | None:
+    """
+    生成预览图的缓存键，文件被修改或影响输出的配置变化后缓存键随之变化
+    :param file_path: 图片路径
+    :param fingerprint: config_fingerprint 的结果
+    :return: 缓存键，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return str(Path(file_path).absolute()), stat.st_size, stat.st_mtime_ns, fingerprint
+
+
+def render_preview(file_path, config, stage_cache=None, cancel_event=None) -> QImage:
+    """
+    生成预览图
+    :param file_path: 图片路径
+    :param config: 配置对象，处理时会修改其中的状态，不应与其他线程共享
+    :param stage_cache: 各阶段输出的缓存
+    :param cancel_event: 取消事件，被设置后在下一个检查点抛出 RenderCancelled
+    :return: 预览图，不经过编码，直接交给 PreviewProvider 显示
+    """
+    processor_chain = build_processor_chain(config, stage_cache)
+    container = ImageContainer(Path(file_path), config.use_equivalent_focal_length(),
+                               preview_size=PREVIEW_SIZE, use_source_cache=True, cancel_event=cancel_event)
+    try:
+        processor_chain.process(container)
+        container.check_cancelled()
+        return pil_to_qimage(container.get_watermark_img())
+    finally:
+        container.close()
 
 
 class PreviewWorker(QThread):
     """预览生成工作线程"""
 
-    preview_ready = Signal(str)  # 预览图片路径
+    preview_ready = Signal(QImage)  # 预览图片
     error = Signal(str)
 
-    def __init__(self, file_path, config, output_path, parent=None):
+    def __init__(self, file_path, config, preview_cache=None, cache_key=None, parent=None):
+        """
+        :param preview_cache: 预览图缓存，生成的预览图以 cache_key 写入其中
+        :param cache_key: preview_cache_key 的结果
+        """
         super().__init__(parent)
         self.file_path = file_path
         self.config = config
-        self.output_path = output_path
-        self._cancelled = False
+        self.preview_cache = preview_cache
+        self.cache_key = cache_key
+        # 完整渲染的耗时（秒），被取消或出错时为 None
+        self.elapsed = None
+        self._cancel_event = threading.Event()
 
     def cancel(self):
-        self._cancelled = True
+        self._cancel_event.set()
 
     def run(self):
         try:
-            if self._cancelled:
-                return
-
-            # 创建处理链
-            processor_chain = ProcessorChain()
-
-            # 如果需要添加阴影
-            if (
-                self.config.has_shadow_enabled()
-                and "square" != self.config.get_layout_type()
-            ):
-                processor_chain.add(SHADOW_PROCESSOR)
-
-            # 根据布局添加不同的水印处理器
-            if self.config.get_layout_type() in layout_items_dict:
-                processor_chain.add(
-                    layout_items_dict.get(self.config.get_layout_type()).processor
-                )
-            else:
-                processor_chain.add(SIMPLE_PROCESSOR)
-
-            # 如果需要添加白边
-            if (
-                self.config.has_white_margin_enabled()
-                and "watermark" in self.config.get_layout_type()
-            ):
-                processor_chain.add(MARGIN_PROCESSOR)
-
-            # 如果需要按原有比例填充
-            if (
-                self.config.has_padding_with_original_ratio_enabled()
-                and "square" != self.config.get_layout_type()
-            ):
-                processor_chain.add(PADDING_TO_ORIGINAL_RATIO_PROCESSOR)
-
-            if self._cancelled:
+            if self._cancel_event.is_set():
                 return
 
-            # 处理图片
-            container = ImageContainer(Path(self.file_path), self.config.use_equivalent_focal_length())
-            processor_chain.process(container)
+            # 处理图片，设置未变化的阶段直接使用上一次预览的结果
+            start = time.perf_counter()
+            image = render_preview(self.file_path, self.config, STAGE_CACHE, self._cancel_event)
+            self.elapsed = time.perf_counter() - start
+            if self.preview_cache is not None and self.cache_key is not None:
+                self.preview_cache.put(self.cache_key, image)
 
-            if self._cancelled:
-                container.close()
+            if self._cancel_event.is_set():
                 return
 
-            # 保存预览图片
-            container.save(self.output_path, quality=85)
-            container.close()
-
-            self.preview_ready.emit(str(self.output_path))
+            self.preview_ready.emit(image)
 
+        except RenderCancelled:
+            return
         except Exception as e:
             logging.exception(f"预览生成错误: {e}")
             self.error.emit(str(e))
 
 
+class PrerenderWorker(QThread):
+    """相邻文件的预览预生成工作线程，之后切换到这些文件时直接显示缓存的预览图"""
+
+    def __init__(self, paths, config, fingerprint, preview_cache, parent=None):
+        """
+        :param paths: 文件路径列表，按生成顺序排列
+        :param config: 配置快照创建的配置对象，不与其他线程共享
+        :param fingerprint: 该配置的 config_fingerprint
+        :param preview_cache: 预览图缓存
+        """
+        super().__init__(parent)
+        self.paths = paths
+        self.config = config
+        self.fingerprint = fingerprint
+        self.preview_cache = preview_cache
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        for path in self.paths:
+            if self._cancel_event.is_set():
+                return
+            key = preview_cache_key(path, self.fingerprint)
+            if key is None or key in self.preview_cache:
+                continue
+            try:
+                # 不使用阶段缓存，避免挤掉当前文件的处理结果
+                image = render_preview(path, self.config, cancel_event=self._cancel_event)
+            except RenderCancelled:
+                return
+            except Exception as e:
+                logger.warning(f"预生成预览失败: {path} : {e}")
+                continue
+            self.preview_cache.put(key, image)
+
+
 class ProcessWorker(QThread):
     """图片处理工作线程"""
 
@@ -105,58 +161,146 @@ class ProcessWorker(QThread):
         self.file_list = file_list
         self.config = config
         self._is_cancelled = False
+        self._executor = None
 
     def cancel(self):
         self._is_cancelled = True
+        if self._executor is not None:
+            self._executor.cancel()
 
     def run(self):
         try:
-            processor_chain = ProcessorChain()
-
-            if (
-                self.config.has_shadow_enabled()
-                and "square" != self.config.get_layout_type()
-            ):
-                processor_chain.add(SHADOW_PROCESSOR)
-
-            if self.config.get_layout_type() in layout_items_dict:
-                processor_chain.add(
-                    layout_items_dict.get(self.config.get_layout_type()).processor
-                )
+            total = len(self.file_list)
+            output_dir = Path(self.config.get_output_dir())
+            jobs = [(source_path, output_dir.joinpath(source_path.name)) for source_path in self.file_list]
+
+            # 增量导出时跳过已是最新的文件
+            manifest = ExportManifest(output_dir)
+            fingerprint = config_fingerprint(self.config)
+            if self.config.has_incremental_enabled():
+                jobs, skipped = manifest.split_jobs(jobs, fingerprint)
             else:
-                processor_chain.add(SIMPLE_PROCESSOR)
+                skipped = []
+            done = len(skipped)
+            if done:
+                self.progress.emit(done, total)
+
+            self._executor = BatchExecutor(self.config.snapshot(),
+                                           self.config.get_batch_mode(),
+                                           self.config.get_batch_workers())
+            if self._is_cancelled:
+                self._executor.cancel()
+            profile = StageProfile() if self.config.has_profiling_enabled() else None
+            try:
+                for result in self._executor.run(jobs):
+                    if result.error is not None:
+                        self.error.emit(f"处理 {result.source_path.name} 失败: {result.error}")
+                    else:
+                        manifest.record(result.source_path, result.target_path, fingerprint)
+                    if profile is not None:
+                        profile.add(result.timings)
+                    done += 1
+                    self.progress.emit(done, total)
+            finally:
+                manifest.save()
+                if profile is not None and profile.images:
+                    logger.info(profile.format())
 
-            if (
-                self.config.has_white_margin_enabled()
-                and "watermark" in self.config.get_layout_type()
-            ):
-                processor_chain.add(MARGIN_PROCESSOR)
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
 
-            if (
-                self.config.has_padding_with_original_ratio_enabled()
-                and "square" != self.config.get_layout_type()
-            ):
-                processor_chain.add(PADDING_TO_ORIGINAL_RATIO_PROCESSOR)
 
-            total = len(self.file_list)
-            for idx, source_path in enumerate(self.file_list):
-                if self._is_cancelled:
-                    break
+def iter_metadata_batches(paths):
+    """
+    分批读取元数据
+    :param paths: 文件路径列表
+    :return: 产出 [(文件路径, exif)] 的生成器
+    """
+    store = get_metadata_store()
+    for i in range(0, len(paths), SCAN_BATCH_SIZE):
+        batch = paths[i:i + SCAN_BATCH_SIZE]
+        yield [(path, metadata.exif) for path, metadata in zip(batch, store.get_many(batch))]
 
-                try:
-                    container = ImageContainer(source_path, self.config.use_equivalent_focal_length())
-                    processor_chain.process(container)
 
-                    target_path = Path(self.config.get_output_dir()).joinpath(
-                        source_path.name
-                    )
-                    container.save(target_path, quality=self.config.get_quality())
-                    container.close()
-                except Exception as e:
-                    self.error.emit(f"处理 {source_path.name} 失败: {str(e)}")
+class ScanWorker(QThread):
+    """输入目录扫描工作线程"""
 
-                self.progress.emit(idx + 1, total)
+    files_found = Signal(object, list)  # 工作线程, [(文件路径, exif)]
+    files_removed = Signal(object, list)  # 工作线程, [文件路径]
+    scan_finished = Signal(object, object)  # 工作线程, 本次的目录快照
+    error = Signal(object, str)
 
-            self.finished.emit()
+    def __init__(self, input_dir, snapshot, parent=None):
+        """
+        :param input_dir: 输入目录
+        :param snapshot: 上一次扫描得到的目录快照，只有新增和修改过的文件会被重新读取
+        """
+        super().__init__(parent)
+        self.input_dir = input_dir
+        self.snapshot = snapshot
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            snapshot = scan_file_stats(self.input_dir)
+            changed, removed = diff_file_stats(self.snapshot, snapshot)
+            if removed:
+                self.files_removed.emit(self, removed)
+
+            # 分批读取元数据，读取一批就显示一批
+            for batch in iter_metadata_batches(changed):
+                if self._cancelled:
+                    return
+                self.files_found.emit(self, batch)
+
+            if not self._cancelled:
+                self.scan_finished.emit(self, snapshot)
         except Exception as e:
-            self.error.emit(str(e))
+            logging.exception(f"扫描目录错误: {e}")
+            self.error.emit(self, str(e))
+
+
+class MetadataWorker(QThread):
+    """元数据读取工作线程，用于手动添加的文件"""
+
+    metadata_loaded = Signal(object, list)  # 工作线程, [(文件路径, exif)]
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            for batch in iter_metadata_batches(self.paths):
+                if self._cancelled:
+                    return
+                self.metadata_loaded.emit(self, batch)
+        except Exception as e:
+            logging.exception(f"读取元数据错误: {e}")
+
+
+class ThumbnailWorker(QThread):
+    """缩略图预生成工作线程，之后列表滚动时只需读取缓存"""
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        cache = get_thumbnail_cache()
+        for path in self.paths:
+            if self._cancelled:
+                return
+            cache.get(path)
@@ -2,8 +2,26 @@
 工具函数模块
 """
 
-from src.utils.exif import get_exif
-from src.utils.file import get_file_list
+from src.utils.cache import (
+    LRUCache,
+    image_nbytes,
+)
+from src.utils.exif import (
+    get_exif,
+    normalize_exif_orientation,
+    extract_exif_thumbnail,
+)
+from src.utils.file import (
+    get_working_dir,
+    get_file_list,
+    scan_file_stats,
+    diff_file_stats,
+)
+from src.utils.metadata import (
+    ImageMetadata,
+    MetadataStore,
+    get_metadata_store,
+)
 from src.utils.image import (
     remove_white_edge,
     concatenate_image,
@@ -12,9 +30,20 @@ from src.utils.image import (
     resize_image_with_height,
     resize_image_with_width,
     append_image_by_side,
+    blurred_background,
+    shadow_canvas,
     text_to_image,
     merge_images,
 )
+from src.utils.thumbnail import (
+    ThumbnailCache,
+    make_thumbnail,
+    get_thumbnail_cache,
+)
+from src.utils.profiling import (
+    StageTimer,
+    StageProfile,
+)
 from src.utils.data import (
     calculate_pixel_count,
     extract_attribute,
@@ -23,8 +52,18 @@ from src.utils.data import (
 )
 
 __all__ = [
+    'LRUCache',
+    'image_nbytes',
     'get_exif',
+    'normalize_exif_orientation',
+    'extract_exif_thumbnail',
+    'get_working_dir',
     'get_file_list',
+    'scan_file_stats',
+    'diff_file_stats',
+    'ImageMetadata',
+    'MetadataStore',
+    'get_metadata_store',
     'remove_white_edge',
     'concatenate_image',
     'padding_image',
@@ -32,8 +71,15 @@ __all__ = [
     'resize_image_with_height',
     'resize_image_with_width',
     'append_image_by_side',
+    'blurred_background',
+    'shadow_canvas',
     'text_to_image',
     'merge_images',
+    'ThumbnailCache',
+    'make_thumbnail',
+    'get_thumbnail_cache',
+    'StageTimer',
+    'StageProfile',
     'calculate_pixel_count',
     'extract_attribute',
     'extract_gps_lat_and_long',
@@ -0,0 +1,100 @@
+"""
+缓存工具
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def image_nbytes(image) -> int:
+    """
+    估算图片对象占用的内存大小
+    :param image: 图片对象
+    :return: 字节数
+    """
+    return image.width * image.height * len(image.getbands())
+
+
+class LRUCache(object):
+    """
+    线程安全的 LRU 缓存，可以同时限制条目数量和内存占用
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=image_nbytes):
+        """
+        :param max_entries: 最大条目数量，为 None 时不限制
+        :param max_bytes: 最大内存占用，为 None 时不限制
+        :param sizeof: 计算单个缓存值内存占用的函数
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        获取缓存值，命中时将其标记为最近使用
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        """
+        写入缓存值，超出限制时淘汰最久未使用的条目
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+            # 单个值超过内存上限时不缓存
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.nbytes += size
+            while self._data and ((self.max_entries is not None and len(self._data) > self.max_entries)
+                                  or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.nbytes -= evicted_size
+
+    def pop(self, key, default=None):
+        """
+        移除缓存值
+        """
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, size = self._data.pop(key)
+            self.nbytes -= size
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+        :return: 条目数量、内存占用、命中与未命中次数
+        """
+        return {
+            'entries': len(self._data),
+            'nbytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -3,11 +3,19 @@ EXIF 信息读取和格式化工具
 """
 
 import logging
+import struct
 
 import exifread
 
 logger = logging.getLogger(__name__)
 
+# EXIF 中的方向标签，以及表示无需旋转的方向值
+ORIENTATION_TAG = 0x0112
+NORMAL_ORIENTATION = 1
+# IFD1 中内嵌缩略图的位置和长度标签
+THUMBNAIL_OFFSET_TAG = 0x0201
+THUMBNAIL_LENGTH_TAG = 0x0202
+
 
 def get_exif(path) -> dict:
     """
@@ -144,19 +152,15 @@ def _format_exposure_time(value) -> str:
 
 
 def _format_orientation(value) -> str:
-    """格式化方向值"""
-    orientation_map = {
-        '1': 'Rotate 0',
-        'Horizontal (normal)': 'Rotate 0',
-        '3': 'Rotate 180',
-        'Rotated 180': 'Rotate 180',
-        '6': 'Rotate 90 CW',
-        'Rotated 90 CW': 'Rotate 90 CW',
-        '8': 'Rotate 270 CW',
-        'Rotated 90 CCW': 'Rotate 270 CW',
-    }
-    str_val = str(value)
-    return orientation_map.get(str_val, 'Rotate 0')
+    """格式化方向值，返回 EXIF 标准中的方向编号 1-8"""
+    try:
+        if hasattr(value, 'values') and len(value.values) > 0:
+            orientation = int(value.values[0])
+            if 1 <= orientation <= 8:
+                return str(orientation)
+    except Exception:
+        pass
+    return str(NORMAL_ORIENTATION)
 
 
 def _format_gps_coordinate(value, ref) -> str:
@@ -190,3 +194,68 @@ def _ratio_to_float(ratio) -> float:
     if hasattr(ratio, 'num') and hasattr(ratio, 'den'):
         return ratio.num / ratio.den if ratio.den != 0 else float(ratio.num)
     return float(ratio)
+
+
+def _read_tiff_header(exif: bytes):
+    """
+    解析 EXIF 数据中的 TIFF 头
+    :param exif: EXIF 数据，可以带有 Exif 标识头
+    :return: (TIFF 头的起始位置, 字节序, IFD0 的位置)
+    """
+    start = 6 if exif.startswith(b'Exif\x00\x00') else 0
+    byte_order = {b'II': '<', b'MM': '>'}[exif[start:start + 2]]
+    ifd_offset = start + struct.unpack_from(byte_order + 'I', exif, start + 4)[0]
+    return start, byte_order, ifd_offset
+
+
+def normalize_exif_orientation(exif: bytes) -> bytes:
+    """
+    将 EXIF 数据中的方向标签改写为 1（无需旋转），其余内容原样保留
+    图片像素已经按方向旋转为正向后，写入改写后的 EXIF，查看器就不会再次旋转
+    :param exif: 原始 EXIF 数据，可以带有 Exif 标识头
+    :return: 改写后的 EXIF 数据，无法解析时原样返回
+    """
+    try:
+        _, byte_order, ifd_offset = _read_tiff_header(exif)
+        entry_count = struct.unpack_from(byte_order + 'H', exif, ifd_offset)[0]
+        for i in range(entry_count):
+            entry_offset = ifd_offset + 2 + i * 12
+            tag, tag_type, count = struct.unpack_from(byte_order + 'HHI', exif, entry_offset)
+            # 方向标签的类型为 SHORT，数量为 1，值直接存放在条目中
+            if tag == ORIENTATION_TAG and tag_type == 3 and count == 1:
+                patched = bytearray(exif)
+                struct.pack_into(byte_order + 'H', patched, entry_offset + 8, NORMAL_ORIENTATION)
+                return bytes(patched)
+    except (KeyError, struct.error) as e:
+        logger.error(f'normalize_exif_orientation error: {e}')
+    return exif
+
+
+def extract_exif_thumbnail(exif: bytes) -> bytes | None:
+    """
+    提取 EXIF 数据中内嵌的 JPEG 缩略图（IFD1）
+    :param exif: EXIF 数据，可以带有 Exif 标识头
+    :return: JPEG 数据，没有内嵌缩略图时返回 None
+    """
+    try:
+        start, byte_order, ifd_offset = _read_tiff_header(exif)
+        entry_count = struct.unpack_from(byte_order + 'H', exif, ifd_offset)[0]
+        next_ifd = struct.unpack_from(byte_order + 'I', exif, ifd_offset + 2 + entry_count * 12)[0]
+        if next_ifd == 0:
+            return None
+        ifd_offset = start + next_ifd
+        values = {}
+        for i in range(struct.unpack_from(byte_order + 'H', exif, ifd_offset)[0]):
+            tag, tag_type, count = struct.unpack_from(byte_order + 'HHI', exif, ifd_offset + 2 + i * 12)
+            if tag in (THUMBNAIL_OFFSET_TAG, THUMBNAIL_LENGTH_TAG):
+                # 类型为 LONG 或 SHORT
+                fmt = 'I' if tag_type == 4 else 'H'
+                values[tag] = struct.unpack_from(byte_order + fmt, exif, ifd_offset + 2 + i * 12 + 8)[0]
+        if THUMBNAIL_OFFSET_TAG not in values or THUMBNAIL_LENGTH_TAG not in values:
+            return None
+        offset = start + values[THUMBNAIL_OFFSET_TAG]
+        thumbnail = exif[offset:offset + values[THUMBNAIL_LENGTH_TAG]]
+        return thumbnail if thumbnail.startswith(b'\xff\xd8') else None
+    except (KeyError, struct.error) as e:
+        logger.error(f'extract_exif_thumbnail error: {e}')
+        return None
@@ -2,8 +2,31 @@
 文件操作工具
 """
 
+import os
+import sys
 from pathlib import Path
 
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+
+def get_working_dir():
+    """获取工作目录（用户数据存放位置）"""
+    if getattr(sys, 'frozen', False):
+        # 打包后的环境
+        if sys.platform == 'darwin':
+            # macOS .app 包，工作目录设为 .app 所在目录
+            app_path = os.path.dirname(sys.executable)  # Contents/MacOS
+            app_path = os.path.dirname(app_path)  # Contents
+            app_path = os.path.dirname(app_path)  # .app
+            app_path = os.path.dirname(app_path)  # .app 所在目录
+            return app_path
+        else:
+            # Windows/Linux
+            return os.path.dirname(sys.executable)
+    else:
+        # 开发环境，项目根目录
+        return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 def get_file_list(path):
     """
@@ -13,4 +36,31 @@ def get_file_list(path):
     """
     path = Path(path)
     return [file_path for file_path in path.iterdir()
-            if file_path.is_file() and file_path.suffix.lower() in ['.jpg', '.jpeg', '.png']]
+            if file_path.is_file() and file_path.suffix.lower() in IMAGE_SUFFIXES]
+
+
+def scan_file_stats(path) -> dict:
+    """
+    扫描目录中的图片文件，只读取目录项中的大小和修改时间，不打开文件
+    :param path: 路径
+    :return: 目录快照，{文件路径: (文件大小, 修改时间)}，保持目录中的顺序
+    """
+    snapshot = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES:
+                stat = entry.stat()
+                snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def diff_file_stats(old: dict, new: dict):
+    """
+    比较两次目录快照
+    :param old: 上一次的目录快照
+    :param new: 本次的目录快照
+    :return: (新增或已修改的文件列表, 已删除的文件列表)
+    """
+    changed = [path for path, stat in new.items() if old.get(path) != stat]
+    removed = [path for path in old if path not in new]
+    return changed, removed
@@ -4,13 +4,35 @@
 
 from PIL import Image
 from PIL import ImageDraw
+from PIL import ImageFilter
 from PIL import ImageOps
+from PIL.Image import Transpose
 
 from src.enums.constant import TRANSPARENT
+from src.utils.cache import LRUCache
 
 
 TINY_HEIGHT = 800
 
+# EXIF 方向值对应的修正操作，每种方向只需要一次变换
+ORIENTATION_TRANSPOSES = {
+    2: Transpose.FLIP_LEFT_RIGHT,
+    3: Transpose.ROTATE_180,
+    4: Transpose.FLIP_TOP_BOTTOM,
+    5: Transpose.TRANSPOSE,
+    6: Transpose.ROTATE_270,
+    7: Transpose.TRANSVERSE,
+    8: Transpose.ROTATE_90,
+}
+# 修正后宽高互换的方向值
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+# 降采样后模糊半径的下限，保证放大后背景依然平滑
+MIN_DOWNSAMPLED_BLUR_RADIUS = 4
+
+# 已渲染的文字图片，可通过 TEXT_IMAGE_CACHE.stats() 查看命中次数与内存占用
+TEXT_IMAGE_CACHE = LRUCache(max_bytes=64 * 1024 * 1024)
+
 
 def remove_white_edge(image):
     """
@@ -218,19 +240,125 @@ def append_image_by_side(background, images, side='left', padding=200, is_start=
             x_offset += padding
 
 
+def shadow_canvas(width, height, radius, color='#6B696A', background=(255, 255, 255)) -> Image.Image:
+    """
+    生成阴影画布：在背景色上绘制一个高斯模糊后的矩形阴影
+    画布大小为 (width + 4 * radius, height + 4 * radius)，阴影矩形位于 (2 * radius, 2 * radius)，
+    结果与直接对整幅画布做 GaussianBlur(radius) 相同。
+    模糊只影响矩形边缘附近的像素，因此只在一个小画布上做一次模糊，
+    再将四个角直接复制、四条边（沿长度方向不变）拉伸到目标尺寸，中间部分为纯色。
+    :param width: 阴影矩形宽度
+    :param height: 阴影矩形高度
+    :param radius: 模糊半径
+    :param color: 阴影颜色
+    :param background: 背景颜色
+    :return: 阴影画布
+    """
+    border = radius * 2
+    # 模糊在矩形边缘内侧的影响范围，Pillow 的高斯模糊由三次半径约为 radius 的盒式模糊组成
+    margin = radius * 4 + 4
+    core = margin * 2 + 1
+    if radius <= 0 or width <= core or height <= core:
+        shadow = Image.new('RGB', (width, height), color=color)
+        shadow = ImageOps.expand(shadow, border=border, fill=background)
+        return shadow.filter(ImageFilter.GaussianBlur(radius=radius))
+
+    # 在小画布上模糊一次
+    small = Image.new('RGB', (core, core), color=color)
+    small = ImageOps.expand(small, border=border, fill=background)
+    small = small.filter(ImageFilter.GaussianBlur(radius=radius))
+
+    canvas = Image.new('RGB', (width + border * 2, height + border * 2), color=color)
+    canvas_width, canvas_height = canvas.size
+    size = small.width
+    corner = border + margin
+    middle = size // 2
+
+    # 四个角
+    canvas.paste(small.crop((0, 0, corner, corner)), (0, 0))
+    canvas.paste(small.crop((size - corner, 0, size, corner)), (canvas_width - corner, 0))
+    canvas.paste(small.crop((0, size - corner, corner, size)), (0, canvas_height - corner))
+    canvas.paste(small.crop((size - corner, size - corner, size, size)),
+                 (canvas_width - corner, canvas_height - corner))
+
+    # 四条边
+    edge_width = canvas_width - corner * 2
+    edge_height = canvas_height - corner * 2
+    top = small.crop((middle, 0, middle + 1, corner)).resize((edge_width, corner), Image.NEAREST)
+    canvas.paste(top, (corner, 0))
+    bottom = small.crop((middle, size - corner, middle + 1, size)).resize((edge_width, corner), Image.NEAREST)
+    canvas.paste(bottom, (corner, canvas_height - corner))
+    left = small.crop((0, middle, corner, middle + 1)).resize((corner, edge_height), Image.NEAREST)
+    canvas.paste(left, (0, corner))
+    right = small.crop((size - corner, middle, size, middle + 1)).resize((corner, edge_height), Image.NEAREST)
+    canvas.paste(right, (canvas_width - corner, corner))
+    return canvas
+
+
+def _pad_with_edge(image, pad) -> Image.Image:
+    """
+    用边缘像素向四周填充图片
+    :param image: 图片对象
+    :param pad: 每一边填充的宽度
+    :return: 填充后的图片
+    """
+    width, height = image.size
+    padded = Image.new(image.mode, (width + 2 * pad, height + 2 * pad))
+    padded.paste(image, (pad, pad))
+    padded.paste(image.crop((0, 0, width, 1)).resize((width, pad)), (pad, 0))
+    padded.paste(image.crop((0, height - 1, width, height)).resize((width, pad)), (pad, pad + height))
+    padded.paste(image.crop((0, 0, 1, height)).resize((pad, height)), (0, pad))
+    padded.paste(image.crop((width - 1, 0, width, height)).resize((pad, height)), (pad + width, pad))
+    for x, y in ((0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1)):
+        corner = Image.new(image.mode, (pad, pad), image.getpixel((x, y)))
+        padded.paste(corner, (0 if x == 0 else pad + width, 0 if y == 0 else pad + height))
+    return padded
+
+
+def blurred_background(image, radius, size, white_ratio=0.1) -> Image.Image:
+    """
+    生成模糊背景：对图片做高斯模糊，与白色按比例混合，再缩放到指定尺寸
+    大半径的模糊不需要原始分辨率，因此先降采样，在低分辨率上以等效半径模糊并完成混合，最后只放大一次
+    :param image: 图片对象
+    :param radius: 原始分辨率下的模糊半径
+    :param size: 输出尺寸
+    :param white_ratio: 白色的混合比例
+    :return: 模糊背景
+    """
+    factor = max(1, int(radius / MIN_DOWNSAMPLED_BLUR_RADIUS))
+    if factor == 1:
+        background = image.filter(ImageFilter.GaussianBlur(radius=radius))
+        box = None
+    else:
+        # 降采样会把边缘像素与内部像素混合，先用边缘像素向外填充一个降采样单位，
+        # 使低分辨率图片的最外圈与原图边缘一致，模糊在边缘处的表现才与原始分辨率相近
+        pad = factor
+        background = _pad_with_edge(image, pad).reduce(factor)
+        background = background.filter(ImageFilter.GaussianBlur(radius=radius / factor))
+        box = (pad / factor, pad / factor, (pad + image.width) / factor, (pad + image.height) / factor)
+    # 等价于 Image.blend(background, 白色, white_ratio)
+    background = background.point(lambda v: v * (1 - white_ratio) + 255 * white_ratio)
+    return background.resize(size, Image.BICUBIC, box=box)
+
+
 def text_to_image(content, font, bold_font, is_bold=False, fill='black') -> Image.Image:
     """
     将文字内容转换为图片
+    相同的文字、字体、字号和颜色只渲染一次，返回的是缓存图片的副本
     """
     if is_bold:
         font = bold_font
     if content == '':
         content = '   '
-    _, _, text_width, text_height = font.getbbox(content)
-    image = Image.new('RGBA', (text_width, text_height), color=TRANSPARENT)
-    draw = ImageDraw.Draw(image)
-    draw.text((0, 0), content, fill=fill, font=font)
-    return image
+    key = (content, getattr(font, 'path', id(font)), getattr(font, 'index', 0), getattr(font, 'size', None), fill)
+    image = TEXT_IMAGE_CACHE.get(key)
+    if image is None:
+        _, _, text_width, text_height = font.getbbox(content)
+        image = Image.new('RGBA', (text_width, text_height), color=TRANSPARENT)
+        draw = ImageDraw.Draw(image)
+        draw.text((0, 0), content, fill=fill, font=font)
+        TEXT_IMAGE_CACHE.put(key, image)
+    return image.copy()
 
 
 def merge_images(images, axis=0, align=0):
@@ -0,0 +1,209 @@
+"""
+图片元数据持久化缓存
+
+将 get_exif 的结果和图片尺寸保存在 SQLite 中，以 (绝对路径, 文件大小, 修改时间) 判断是否有效，
+再次打开同一批照片时不需要重新读取文件头。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+
+from src.utils.exif import get_exif
+from src.utils.file import get_working_dir
+
+logger = logging.getLogger(__name__)
+
+# 相对于工作目录解析，不随当前目录变化，命令行和界面共用同一个缓存
+METADATA_DB_PATH = os.path.join(get_working_dir(), 'cache', 'metadata.sqlite3')
+# get_exif 的输出格式变化时需要增加版本号，旧的缓存会被清空
+SCHEMA_VERSION = 1
+# 单条 SQL 中查询的最大路径数量，避免超过 SQLite 的参数数量限制
+BATCH_SIZE = 500
+
+
+@dataclass
+class ImageMetadata(object):
+    """
+    图片元数据
+    """
+    exif: dict
+    # 文件中存储的宽高，未按照方向修正
+    width: int
+    height: int
+
+
+def _file_key(path) -> tuple[str, int, int] | None:
+    """
+    获取文件的缓存键
+    :param path: 文件路径
+    :return: (绝对路径, 文件大小, 修改时间)，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return str(Path(path).absolute()), stat.st_size, stat.st_mtime_ns
+
+
+def read_metadata(path, size: tuple[int, int] | None = None) -> ImageMetadata:
+    """
+    直接从文件中读取元数据，只解析文件头，不解码像素
+    :param path: 文件路径
+    :param size: 文件中存储的宽高，调用方已经打开图片时传入，不再为读取尺寸打开图片
+    :return: 元数据
+    """
+    width, height = size or (0, 0)
+    if size is None:
+        try:
+            with Image.open(path) as img:
+                width, height = img.size
+        except Exception as e:
+            logger.error(f'read_metadata error: {path} : {e}')
+    return ImageMetadata(get_exif(path), width, height)
+
+
+class MetadataStore(object):
+    """
+    基于 SQLite 的元数据缓存，可以在多个线程和进程中同时使用
+    """
+
+    def __init__(self, db_path=METADATA_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                with self._conn:
+                    self._conn.execute('DROP TABLE IF EXISTS metadata')
+                    self._conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+            with self._conn:
+                self._conn.execute('CREATE TABLE IF NOT EXISTS metadata ('
+                                   'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, '
+                                   'exif TEXT, width INTEGER, height INTEGER)')
+        except sqlite3.Error as e:
+            # 缓存不可用时直接读取文件，不影响正常使用
+            logger.error(f'打开元数据缓存失败: {db_path} : {e}')
+            self._conn = None
+
+    def get(self, path, size: tuple[int, int] | None = None) -> ImageMetadata:
+        """
+        获取单个文件的元数据，缓存无效时读取文件并更新缓存
+        :param path: 文件路径
+        :param size: 文件中存储的宽高，见 read_metadata
+        :return: 元数据
+        """
+        return self.get_many([path], [size])[0]
+
+    def get_many(self, paths, sizes=None) -> list[ImageMetadata]:
+        """
+        批量获取元数据，缓存无效的文件会被重新读取，并在同一个事务中写回缓存
+        :param paths: 文件路径列表
+        :param sizes: 与 paths 顺序一致的宽高列表，元素为 None 或整个列表为 None 时从文件中读取
+        :return: 与 paths 顺序一致的元数据列表
+        """
+        paths = list(paths)
+        sizes = list(sizes) if sizes is not None else [None] * len(paths)
+        keys = [_file_key(path) for path in paths]
+        cached = self._select([key[0] for key in keys if key is not None])
+
+        result, rows = [], []
+        for path, key, size in zip(paths, keys, sizes):
+            row = cached.get(key[0]) if key is not None else None
+            if row is not None and (row[0], row[1]) == key[1:]:
+                result.append(ImageMetadata(json.loads(row[2]), row[3], row[4]))
+                continue
+            metadata = read_metadata(path, size)
+            result.append(metadata)
+            if key is not None:
+                rows.append((*key, json.dumps(metadata.exif, ensure_ascii=False), metadata.width, metadata.height))
+        self._insert(rows)
+        return result
+
+    def lookup(self, path) -> ImageMetadata | None:
+        """
+        只查询缓存，不读取文件，也不写入缓存
+        :param path: 文件路径
+        :return: 元数据，没有有效的缓存时返回 None
+        """
+        key = _file_key(path)
+        if key is None:
+            return None
+        row = self._select([key[0]]).get(key[0])
+        if row is None or (row[0], row[1]) != key[1:]:
+            return None
+        return ImageMetadata(json.loads(row[2]), row[3], row[4])
+
+    def evict_stale(self) -> int:
+        """
+        删除文件已经不存在或已被修改的缓存
+        :return: 删除的条目数量
+        """
+        if self._conn is None:
+            return 0
+        try:
+            with self._lock:
+                rows = self._conn.execute('SELECT path, size, mtime_ns FROM metadata').fetchall()
+            stale = [(path,) for path, size, mtime_ns in rows if _file_key(path) != (path, size, mtime_ns)]
+            with self._lock, self._conn:
+                self._conn.executemany('DELETE FROM metadata WHERE path = ?', stale)
+        except sqlite3.Error as e:
+            logger.error(f'清理元数据缓存失败: {e}')
+            return 0
+        return len(stale)
+
+    def _select(self, paths) -> dict:
+        if self._conn is None:
+            return {}
+        result = {}
+        try:
+            with self._lock:
+                for i in range(0, len(paths), BATCH_SIZE):
+                    batch = paths[i:i + BATCH_SIZE]
+                    cursor = self._conn.execute(
+                        'SELECT path, size, mtime_ns, exif, width, height FROM metadata '
+                        f'WHERE path IN ({",".join("?" * len(batch))})', batch)
+                    for row in cursor:
+                        result[row[0]] = row[1:]
+        except sqlite3.Error as e:
+            logger.error(f'读取元数据缓存失败: {e}')
+        return result
+
+    def _insert(self, rows) -> None:
+        if self._conn is None or not rows:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            logger.error(f'写入元数据缓存失败: {e}')
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_metadata_store = None
+_metadata_store_lock = threading.Lock()
+
+
+def get_metadata_store() -> MetadataStore:
+    """
+    获取当前进程共享的元数据缓存
+    """
+    global _metadata_store
+    if _metadata_store is None:
+        with _metadata_store_lock:
+            if _metadata_store is None:
+                _metadata_store = MetadataStore()
+    return _metadata_store
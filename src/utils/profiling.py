@@ -0,0 +1,78 @@
+"""
+处理阶段计时
+
+开启后记录每张图片在解码、读取 EXIF、各个处理器和 JPEG 编码上的耗时及输出尺寸，
+并按批次汇总。未开启时调用方持有的计时器为 None，只多一次判断。
+"""
+
+import time
+
+STAGE_EXIF = 'exif'
+STAGE_DECODE = 'decode'
+STAGE_ENCODE = 'encode'
+
+
+class StageTimer(object):
+    """
+    单张图片的阶段计时器
+    """
+
+    def __init__(self):
+        # [(阶段名称, 耗时秒数, 输出宽度, 输出高度)]，可被 pickle 后从子进程返回
+        self.records: list[tuple[str, float, int, int]] = []
+
+    def record(self, stage: str, start: float, size: tuple[int, int] = (0, 0)) -> None:
+        """
+        记录一个阶段
+        :param stage: 阶段名称
+        :param start: 阶段开始时 time.perf_counter() 的返回值
+        :param size: 该阶段输出图像的尺寸
+        """
+        self.records.append((stage, time.perf_counter() - start, size[0], size[1]))
+
+
+class StageProfile(object):
+    """
+    一个批次中各阶段耗时的汇总
+    """
+
+    def __init__(self):
+        # 阶段名称 -> [次数, 总耗时, 最大耗时, 最大输出像素数]，按首次出现的顺序排列
+        self._stages: dict[str, list] = {}
+        self.images = 0
+
+    def add(self, records) -> None:
+        """
+        加入一张图片的计时记录
+        :param records: StageTimer.records
+        """
+        if not records:
+            return
+        self.images += 1
+        for stage, seconds, width, height in records:
+            stats = self._stages.setdefault(stage, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] = max(stats[3], width * height)
+
+    def stages(self) -> dict[str, dict]:
+        """
+        获取各阶段的汇总结果
+        :return: {阶段名称: {count, total, mean, max, max_pixels}}，时间单位为秒
+        """
+        return {stage: {'count': count, 'total': total, 'mean': total / count, 'max': longest, 'max_pixels': pixels}
+                for stage, (count, total, longest, pixels) in self._stages.items()}
+
+    def format(self) -> str:
+        """
+        生成便于阅读的汇总表格
+        """
+        stages = self.stages()
+        total = sum(stats['total'] for stats in stages.values()) or 1.0
+        lines = [f'{self.images} 张图片的阶段耗时：',
+                 f'{"阶段":<36}{"总计(s)":>10}{"占比":>8}{"平均(ms)":>10}{"最大(ms)":>10}{"最大像素":>12}']
+        for stage, stats in stages.items():
+            lines.append(f'{stage:<38}{stats["total"]:>10.2f}{stats["total"] / total:>9.1%}'
+                         f'{stats["mean"] * 1000:>12.1f}{stats["max"] * 1000:>12.1f}{stats["max_pixels"]:>14}')
+        return '\n'.join(lines)
@@ -0,0 +1,193 @@
+"""
+缩略图磁盘缓存
+
+优先使用 EXIF 中内嵌的缩略图，否则以 JPEG 草稿模式按缩略图尺寸解码，生成后保存在磁盘上，
+之后只读取缓存文件，不再打开原图。缓存按最近使用时间淘汰。
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+from src.utils.exif import extract_exif_thumbnail
+from src.utils.exif import NORMAL_ORIENTATION
+from src.utils.exif import ORIENTATION_TAG
+from src.utils.file import get_working_dir
+from src.utils.image import ORIENTATION_TRANSPOSES
+from src.utils.metadata import ImageMetadata
+from src.utils.metadata import get_metadata_store
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CACHE_DIR = os.path.join(get_working_dir(), 'cache', 'thumbnails')
+# 缩略图长边的尺寸
+THUMBNAIL_SIZE = 160
+# 磁盘缓存的最大占用
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+THUMBNAIL_QUALITY = 85
+# 内嵌缩略图与原图比例的最大相对误差
+EMBEDDED_RATIO_TOLERANCE = 0.02
+
+
+def make_thumbnail(path, size=THUMBNAIL_SIZE, metadata: ImageMetadata | None = None) -> Image.Image:
+    """
+    生成缩略图，已按 EXIF 方向修正
+    :param path: 图片路径
+    :param size: 缩略图长边的尺寸
+    :param metadata: 扫描时已经读取的元数据，提供方向和原图尺寸，为 None 时从文件中读取
+    :return: RGB 缩略图
+    """
+    with Image.open(path) as img:
+        if metadata is not None:
+            orientation = int(metadata.exif.get('Orientation', NORMAL_ORIENTATION))
+            width, height = (metadata.width, metadata.height) if metadata.width and metadata.height else img.size
+        else:
+            orientation = img.getexif().get(ORIENTATION_TAG, NORMAL_ORIENTATION)
+            width, height = img.size
+        thumbnail = None
+        # 内嵌缩略图足够大且与原图比例一致时直接使用，不需要解码原图
+        # 经过编辑的图片可能保留了相机生成的旧缩略图，比例不一致时不使用
+        embedded = extract_exif_thumbnail(img.info['exif']) if 'exif' in img.info else None
+        if embedded is not None:
+            try:
+                candidate = Image.open(io.BytesIO(embedded))
+                ratio = candidate.width / candidate.height
+                if (max(candidate.size) >= size
+                        and abs(ratio - width / height) <= ratio * EMBEDDED_RATIO_TOLERANCE):
+                    thumbnail = candidate
+            except (OSError, ZeroDivisionError):
+                pass
+        if thumbnail is None:
+            img.draft('RGB', (size, size))
+            thumbnail = img
+        thumbnail = thumbnail.convert('RGB')
+    thumbnail.thumbnail((size, size), Image.Resampling.BICUBIC)
+    if orientation in ORIENTATION_TRANSPOSES:
+        thumbnail = thumbnail.transpose(ORIENTATION_TRANSPOSES[orientation])
+    return thumbnail
+
+
+class ThumbnailCache(object):
+    """
+    缩略图磁盘缓存，可以在多个线程中同时使用
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, size=THUMBNAIL_SIZE, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        """
+        :param cache_dir: 缓存目录
+        :param size: 缩略图长边的尺寸
+        :param max_bytes: 缓存的最大占用
+        """
+        self.cache_dir = Path(cache_dir)
+        self.size = size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 缓存目录的当前占用，首次写入时统计
+        self._nbytes = None
+
+    def _cache_path(self, path) -> Path | None:
+        """
+        获取缩略图的缓存路径，原图发生变化后缓存路径随之变化
+        :return: 缓存路径，原图不存在时返回 None
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = f'{Path(path).absolute()}|{stat.st_size}|{stat.st_mtime_ns}|{self.size}'
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.cache_dir.joinpath(digest[:2], digest + '.jpg')
+
+    def get(self, path, metadata: ImageMetadata | None = None) -> Path | None:
+        """
+        获取缩略图文件，不存在时生成
+        :param path: 图片路径
+        :param metadata: 图片的元数据，为 None 时使用元数据缓存中扫描时保存的结果
+        :return: 缩略图文件路径，生成失败时返回 None
+        """
+        cache_path = self._cache_path(path)
+        if cache_path is None:
+            return None
+        if cache_path.exists():
+            # 更新修改时间，作为最近使用时间
+            try:
+                os.utime(cache_path)
+                return cache_path
+            except OSError:
+                pass
+
+        try:
+            if metadata is None:
+                metadata = get_metadata_store().lookup(path)
+            thumbnail = make_thumbnail(path, self.size, metadata)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f'{cache_path.name}.{threading.get_ident()}.tmp')
+            thumbnail.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.error(f'生成缩略图失败: {path} : {e}')
+            return None
+        self._add_bytes(cache_path.stat().st_size)
+        return cache_path
+
+    def _add_bytes(self, nbytes) -> None:
+        with self._lock:
+            if self._nbytes is None:
+                self._nbytes = sum(f.stat().st_size for f in self._files())
+            else:
+                self._nbytes += nbytes
+            if self._nbytes > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        return list(self.cache_dir.glob('*/*.jpg'))
+
+    def _evict(self) -> None:
+        """
+        淘汰最久未使用的缩略图，直到占用降到上限的 90%
+        """
+        files = []
+        for f in self._files():
+            try:
+                stat = f.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, f))
+            except OSError:
+                continue
+        files.sort()
+        self._nbytes = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, size, f in files:
+            if self._nbytes <= target:
+                break
+            try:
+                f.unlink()
+                self._nbytes -= size
+            except OSError:
+                continue
+
+    def clear(self) -> None:
+        with self._lock:
+            for f in self._files():
+                f.unlink(missing_ok=True)
+            self._nbytes = 0
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """
+    获取当前进程共享的缩略图缓存
+    """
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        with _thumbnail_cache_lock:
+            if _thumbnail_cache is None:
+                _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
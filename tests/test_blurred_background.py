@@ -0,0 +1,95 @@
+"""
+blurred_background 与原始分辨率高斯模糊的视觉等价性
+
+blurred_background 先降采样再模糊，结果与原始分辨率上的 GaussianBlur 加白色混合并不完全相同，
+这里限定两者的最大差值和平均差值，修改降采样倍数等参数时不会在不知不觉中偏离原来的效果。
+"""
+
+import pytest
+from PIL import Image
+from PIL import ImageChops
+from PIL import ImageDraw
+from PIL import ImageFilter
+
+from src.utils.image import MIN_DOWNSAMPLED_BLUR_RADIUS
+from src.utils.image import blurred_background
+
+WHITE_RATIO = 0.1
+# 单个通道的最大差值，出现在高对比度的边缘处
+MAX_DIFF = 24
+# 所有通道的平均差值
+MEAN_DIFF = 0.5
+# 很小的图片中边缘像素的占比大，平均差值允许更大
+SMALL_MEAN_DIFF = 1.0
+
+
+def make_image(width, height) -> Image.Image:
+    """
+    生成包含平滑区域、噪声和高对比度边缘的测试图片，内容固定
+    """
+    smooth = Image.effect_mandelbrot((width, height), (-2.2, -1.3, 1.0, 1.3), 60)
+    noise = Image.effect_noise((width, height), 64)
+    checker = Image.new('L', (width, height))
+    draw = ImageDraw.Draw(checker)
+    step = max(2, min(width, height) // 12)
+    for y in range(0, height, step):
+        for x in range(0, width, step):
+            if (x // step + y // step) % 2:
+                draw.rectangle((x, y, x + step - 1, y + step - 1), fill=255)
+    return Image.merge('RGB', (smooth, noise, checker))
+
+
+def reference_background(image, radius, size) -> Image.Image:
+    """
+    原始分辨率上的高斯模糊与白色混合，再缩放到输出尺寸
+    """
+    background = image.filter(ImageFilter.GaussianBlur(radius=radius))
+    background = background.point(lambda v: v * (1 - WHITE_RATIO) + 255 * WHITE_RATIO)
+    return background.resize(size, Image.BICUBIC)
+
+
+def diff_stats(a, b) -> tuple[int, float]:
+    """
+    :return: (最大差值, 平均差值)
+    """
+    diff = ImageChops.difference(a, b)
+    histogram = diff.histogram()
+    total = sum(value * count for band in range(3)
+                for value, count in enumerate(histogram[band * 256:(band + 1) * 256]))
+    return max(high for _, high in diff.getextrema()), total / (3 * a.width * a.height)
+
+
+def output_size(image) -> tuple[int, int]:
+    return int(image.width * 1.18), int(image.height * 1.18)
+
+
+@pytest.mark.parametrize('width, height, radius, mean_limit', [
+    # 横图与竖图，预览分辨率和较大的分辨率
+    (1600, 1067, 35, MEAN_DIFF),
+    (1067, 1600, 35, MEAN_DIFF),
+    (4000, 3000, 100, MEAN_DIFF),
+    (3000, 4000, 100, MEAN_DIFF),
+    # 很小的图片，模糊半径接近图片尺寸
+    (64, 48, 35, SMALL_MEAN_DIFF),
+    (24, 40, 10, SMALL_MEAN_DIFF),
+    (8, 6, 5, SMALL_MEAN_DIFF),
+])
+def test_downsampled_blur_matches_full_resolution(width, height, radius, mean_limit):
+    image = make_image(width, height)
+    size = output_size(image)
+    result = blurred_background(image, radius, size, WHITE_RATIO)
+    assert result.size == size
+    assert result.mode == image.mode
+
+    max_diff, mean_diff = diff_stats(result, reference_background(image, radius, size))
+    assert max_diff <= MAX_DIFF
+    assert mean_diff <= mean_limit
+
+
+def test_small_radius_is_exact():
+    # 半径小于降采样阈值时不降采样，结果应与参考完全一致
+    image = make_image(300, 200)
+    radius = MIN_DOWNSAMPLED_BLUR_RADIUS - 1
+    size = output_size(image)
+    result = blurred_background(image, radius, size, WHITE_RATIO)
+    assert diff_stats(result, reference_background(image, radius, size)) == (0, 0.0)
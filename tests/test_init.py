@@ -0,0 +1,48 @@
+"""
+src.init 中延迟创建的模块属性
+"""
+
+import importlib.util
+
+import pytest
+
+from src.entity.menu import Menu
+
+
+@pytest.fixture
+def init(tmp_path, monkeypatch):
+    """独立加载一份 src.init，配置文件 config.yaml 创建在临时目录中"""
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.find_spec('src.init')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def public_names(module) -> set:
+    return {name for name in vars(module) if not name.startswith('_')}
+
+
+def test_menu_exposes_only_public_names(init):
+    before = public_names(init)
+    assert isinstance(init.root_menu, Menu)
+    assert set(init.LOCATION_MENU_MAP) == {'left_top', 'right_top', 'left_bottom', 'right_bottom'}
+    added = public_names(init) - before
+    assert added == {'config', 'root_menu', 'LOCATION_MENU_MAP', 'LAYOUT_ITEMS', 'layout_items_dict',
+                     'EMPTY_PROCESSOR', 'WATERMARK_PROCESSOR', 'WATERMARK_LEFT_LOGO_PROCESSOR',
+                     'WATERMARK_RIGHT_LOGO_PROCESSOR', 'MARGIN_PROCESSOR', 'SHADOW_PROCESSOR', 'SQUARE_PROCESSOR',
+                     'SIMPLE_PROCESSOR', 'PADDING_TO_ORIGINAL_RATIO_PROCESSOR', 'BACKGROUND_BLUR_PROCESSOR',
+                     'BACKGROUND_BLUR_WITH_WHITE_BORDER_PROCESSOR', 'PURE_WHITE_MARGIN_PROCESSOR'}
+
+
+def test_layout_items_do_not_build_menu(init):
+    assert init.LAYOUT_ITEMS
+    assert init.layout_items_dict == {item.value: item for item in init.LAYOUT_ITEMS}
+    assert 'root_menu' not in vars(init)
+
+
+@pytest.mark.parametrize('name', ['layout_menu', 'item', 'menu_item', 'unknown'])
+def test_unknown_attribute_raises(init, name):
+    with pytest.raises(AttributeError):
+        getattr(init, name)
+    assert 'root_menu' not in vars(init)
@@ -0,0 +1,76 @@
+"""
+元数据缓存的位置，以及批量导出时绕过缓存读取 EXIF
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from src.entity import image_container
+from src.entity.image_container import decode_source
+from src.utils import metadata
+from src.utils.file import get_working_dir
+from src.utils.thumbnail import THUMBNAIL_CACHE_DIR
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    exif = Image.Exif()
+    exif[0x010F] = 'Canon'  # Make
+    exif[0x0110] = 'Canon EOS R5'  # Model
+    exif[0x0112] = 6  # Orientation
+    Image.new('RGB', (60, 40), 'gray').save(path, exif=exif.tobytes())
+    return path
+
+
+def test_cache_paths_are_under_working_dir():
+    assert os.path.isabs(metadata.METADATA_DB_PATH)
+    assert os.path.isabs(THUMBNAIL_CACHE_DIR)
+    assert metadata.METADATA_DB_PATH.startswith(get_working_dir())
+    assert THUMBNAIL_CACHE_DIR.startswith(get_working_dir())
+
+
+def test_decode_without_store(photo, monkeypatch):
+    def fail():
+        raise AssertionError('不应访问元数据缓存')
+
+    monkeypatch.setattr(image_container, 'get_metadata_store', fail)
+    source = decode_source(photo, use_metadata_store=False)
+    assert source.exif['Make'] == 'Canon'
+    assert source.exif['CameraModelName'] == 'Canon EOS R5'
+    assert source.orientation == 6
+    assert (source.original_width, source.original_height) == (40, 60)
+
+
+def test_decode_with_store(photo, tmp_path, monkeypatch):
+    store = metadata.MetadataStore(tmp_path / 'metadata.sqlite3')
+    monkeypatch.setattr(metadata, '_metadata_store', store)
+    direct = decode_source(photo, use_metadata_store=False)
+    cached = decode_source(photo)
+    assert cached.exif == direct.exif
+    # 经过缓存读取时写入了缓存
+    assert store._select([str(photo.absolute())])
+    store.close()
+
+
+def test_cache_miss_opens_image_once(photo, tmp_path, monkeypatch):
+    store = metadata.MetadataStore(tmp_path / 'metadata.sqlite3')
+    monkeypatch.setattr(metadata, '_metadata_store', store)
+    opened = []
+    image_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return image_open(*args, **kwargs)
+
+    monkeypatch.setattr(Image, 'open', counting_open)
+    decode_source(photo)
+    # 缓存未命中时使用 decode_source 已经打开的图片的宽高
+    assert opened == [photo]
+    cached = store.get(photo)
+    # 缓存中保存的是文件中存储的宽高，未按方向修正
+    assert (cached.width, cached.height) == (60, 40)
+    assert cached.exif['Make'] == 'Canon'
+    store.close()
@@ -0,0 +1,144 @@
+"""
+EXIF 方向 1-8 的解码与保存
+
+为每个方向值生成一张测试图片：像素按该方向对应的存储方式保存，修正后应当与同一张正向图片一致。
+解码后的图像必须是正向的且宽高正确；保存后的文件中 IFD0 的方向标签为 1，其余 EXIF 原样保留。
+"""
+
+import pytest
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+from src.entity.image_container import ImageContainer
+from src.entity.image_container import decode_source
+from src.utils import metadata
+from src.utils.exif import ORIENTATION_TAG
+from src.utils.exif import normalize_exif_orientation
+from src.utils.image import ORIENTATION_TRANSPOSES
+from src.utils.image import ROTATED_ORIENTATIONS
+
+# 正向图片的宽高，横向且不是正方形，宽高互换时能够发现
+WIDTH, HEIGHT = 96, 64
+# 正向图片四个象限的颜色：左上、右上、左下、右下
+QUADRANT_COLORS = ((255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0))
+# JPEG 压缩后单个通道允许的误差
+COLOR_TOLERANCE = 16
+# 解码时的变换为 ROTATE_270 / ROTATE_90，存储时需要反向旋转，其余变换的逆变换就是自身
+STORE_TRANSPOSES = {
+    **ORIENTATION_TRANSPOSES,
+    6: Image.Transpose.ROTATE_90,
+    8: Image.Transpose.ROTATE_270,
+}
+
+MAKE = 'NIKON CORPORATION'
+MODEL = 'NIKON Z 7_2'
+DATETIME_ORIGINAL = '2023:04:09 12:19:19'
+EXIF_IFD = 0x8769
+
+
+def make_upright() -> Image.Image:
+    img = Image.new('RGB', (WIDTH, HEIGHT))
+    half_w, half_h = WIDTH // 2, HEIGHT // 2
+    for i, color in enumerate(QUADRANT_COLORS):
+        x, y = (i % 2) * half_w, (i // 2) * half_h
+        img.paste(color, (x, y, x + half_w, y + half_h))
+    return img
+
+
+def write_fixture(path, orientation: int) -> None:
+    """
+    写入一张方向标签为 orientation 的测试图片，像素按相机的存储方式保存
+    """
+    img = make_upright()
+    if orientation in STORE_TRANSPOSES:
+        img = img.transpose(STORE_TRANSPOSES[orientation])
+    exif = Image.Exif()
+    exif[0x010F] = MAKE  # Make
+    exif[0x0110] = MODEL  # Model
+    exif[ORIENTATION_TAG] = orientation
+    ifd = exif.get_ifd(EXIF_IFD)
+    ifd[0x829D] = IFDRational(4, 1)  # FNumber
+    ifd[0x9003] = DATETIME_ORIGINAL  # DateTimeOriginal
+    img.save(path, quality=95, exif=exif.tobytes())
+
+
+def assert_upright(img: Image.Image, width: int, height: int) -> None:
+    assert img.size == (width, height)
+    rgb = img.convert('RGB')
+    for i, color in enumerate(QUADRANT_COLORS):
+        # 取每个象限的中心点
+        x = (i % 2 * 2 + 1) * width // 4
+        y = (i // 2 * 2 + 1) * height // 4
+        pixel = rgb.getpixel((x, y))
+        assert all(abs(a - b) <= COLOR_TOLERANCE for a, b in zip(pixel, color)), (i, pixel, color)
+
+
+@pytest.fixture(autouse=True)
+def metadata_store(tmp_path, monkeypatch):
+    """元数据缓存写入临时目录，不在仓库中生成文件"""
+    store = metadata.MetadataStore(tmp_path / 'metadata.sqlite3')
+    monkeypatch.setattr(metadata, '_metadata_store', store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(params=range(1, 9), ids=lambda orientation: f'orientation-{orientation}')
+def fixture(request, tmp_path):
+    path = tmp_path / f'orientation_{request.param}.jpg'
+    write_fixture(path, request.param)
+    return path, request.param
+
+
+def test_decode_is_upright(fixture):
+    path, orientation = fixture
+    source = decode_source(path, load=True)
+    assert source.orientation == orientation
+    assert (source.original_width, source.original_height) == (WIDTH, HEIGHT)
+    assert_upright(source.img, WIDTH, HEIGHT)
+
+
+def test_preview_decode_is_upright(fixture):
+    path, orientation = fixture
+    source = decode_source(path, preview_size=WIDTH // 2, load=True)
+    assert (source.original_width, source.original_height) == (WIDTH, HEIGHT)
+    assert_upright(source.img, WIDTH // 2, HEIGHT // 2)
+
+
+def test_stored_size_is_swapped_for_rotated_orientations(fixture):
+    path, orientation = fixture
+    with Image.open(path) as img:
+        stored = img.size
+    assert stored == ((HEIGHT, WIDTH) if orientation in ROTATED_ORIENTATIONS else (WIDTH, HEIGHT))
+
+
+def test_save_normalizes_orientation(fixture, tmp_path):
+    path, orientation = fixture
+    target = tmp_path / 'output.jpg'
+    container = ImageContainer(path)
+    container.get_watermark_img()
+    container.save(target)
+    container.close()
+
+    with Image.open(target) as saved:
+        assert_upright(saved, WIDTH, HEIGHT)
+        exif = saved.getexif()
+    assert exif[ORIENTATION_TAG] == 1
+    assert exif[0x010F] == MAKE
+    assert exif[0x0110] == MODEL
+    ifd = exif.get_ifd(EXIF_IFD)
+    assert ifd[0x9003] == DATETIME_ORIGINAL
+    assert float(ifd[0x829D]) == 4.0
+
+
+def test_normalize_keeps_other_bytes(fixture):
+    path, orientation = fixture
+    with Image.open(path) as img:
+        original = img.info['exif']
+    normalized = normalize_exif_orientation(original)
+    assert len(normalized) == len(original)
+    # 只有方向标签的值（2 个字节）被改写
+    changed = [i for i, (a, b) in enumerate(zip(original, normalized)) if a != b]
+    assert len(changed) <= 2
+    exif = Image.Exif()
+    exif.load(normalized)
+    assert exif[ORIENTATION_TAG] == 1
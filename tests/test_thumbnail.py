@@ -0,0 +1,74 @@
+"""
+缩略图使用扫描时保存的元数据
+"""
+
+import pytest
+from PIL import Image
+
+from src.utils import metadata
+from src.utils import thumbnail
+from src.utils.thumbnail import ThumbnailCache
+from src.utils.thumbnail import make_thumbnail
+
+SIZE = 32
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """横向存储、方向标签为 6 的图片，修正后为竖向"""
+    path = tmp_path / 'photo.jpg'
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation
+    Image.new('RGB', (120, 80), 'gray').save(path, exif=exif.tobytes())
+    return path
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = metadata.MetadataStore(tmp_path / 'metadata.sqlite3')
+    monkeypatch.setattr(metadata, '_metadata_store', store)
+    yield store
+    store.close()
+
+
+def spy_make_thumbnail(monkeypatch) -> list:
+    """记录 ThumbnailCache 传给 make_thumbnail 的元数据"""
+    received = []
+
+    def spy(path, size, entry=None):
+        received.append(entry)
+        return make_thumbnail(path, size, entry)
+
+    monkeypatch.setattr(thumbnail, 'make_thumbnail', spy)
+    return received
+
+
+def test_make_thumbnail_uses_metadata(photo):
+    entry = metadata.read_metadata(photo)
+    assert make_thumbnail(photo, SIZE, entry).size == (21, SIZE)
+    # 方向只取自元数据，不再从文件中读取
+    entry.exif['Orientation'] = '1'
+    assert make_thumbnail(photo, SIZE, entry).size == (SIZE, 21)
+
+
+def test_make_thumbnail_without_metadata(photo):
+    assert make_thumbnail(photo, SIZE).size == (21, SIZE)
+
+
+def test_cache_uses_store_entry(photo, store, tmp_path, monkeypatch):
+    entry = store.get(photo)
+    received = spy_make_thumbnail(monkeypatch)
+    cache_path = ThumbnailCache(tmp_path / 'thumbnails', size=SIZE).get(photo)
+    assert received == [entry]
+    with Image.open(cache_path) as img:
+        assert img.size == (21, SIZE)
+
+
+def test_cache_falls_back_without_store_entry(photo, store, tmp_path, monkeypatch):
+    received = spy_make_thumbnail(monkeypatch)
+    cache_path = ThumbnailCache(tmp_path / 'thumbnails', size=SIZE).get(photo)
+    assert received == [None]
+    with Image.open(cache_path) as img:
+        assert img.size == (21, SIZE)
+    # 只查询缓存，不写入
+    assert store.lookup(photo) is None
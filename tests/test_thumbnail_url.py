@@ -0,0 +1,66 @@
+"""
+缩略图地址中的文件版本
+"""
+
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+pytest.importorskip('PySide6.QtQuick')
+
+from src.ui import thumbnail_provider
+from src.ui.file_list_model import FileEntry
+from src.ui.thumbnail_provider import THUMBNAIL_PROVIDER_ID
+from src.ui.thumbnail_provider import ThumbnailProvider
+from src.ui.thumbnail_provider import thumbnail_url
+
+
+class FakeThumbnailCache(object):
+    def __init__(self):
+        self.requested = []
+
+    def get(self, path):
+        self.requested.append(path)
+        return None
+
+
+def request_path(url: str, monkeypatch) -> str:
+    """返回 ThumbnailProvider 收到 url 后向缩略图缓存请求的路径"""
+    cache = FakeThumbnailCache()
+    monkeypatch.setattr(thumbnail_provider, 'get_thumbnail_cache', lambda: cache)
+    prefix = f'image://{THUMBNAIL_PROVIDER_ID}/'
+    assert url.startswith(prefix)
+    ThumbnailProvider().requestImage(url[len(prefix):], None, None)
+    return cache.requested[0]
+
+
+@pytest.mark.parametrize('name', ['photo.jpg', 'a?b.jpg', '100% 照片 #1.jpg'])
+def test_provider_strips_version(tmp_path, monkeypatch, name):
+    path = tmp_path / name
+    assert request_path(thumbnail_url(path, '10-20'), monkeypatch) == str(path)
+    assert request_path(thumbnail_url(path), monkeypatch) == str(path)
+
+
+def test_version_changes_with_file(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(b'1234')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    entry = FileEntry(Path(path))
+    url = thumbnail_url(entry.path, entry.get_version())
+    assert urlsplit(url).query == 'v=4-1000000000'
+    assert entry.get_size() == 4
+
+    path.write_bytes(b'123456')
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    # 重新读取 EXIF 时才会重新读取文件信息
+    entry.set_exif({})
+    assert thumbnail_url(entry.path, entry.get_version()) != url
+    assert entry.get_size() == 6
+
+
+def test_missing_file_version(tmp_path):
+    entry = FileEntry(tmp_path / 'missing.jpg')
+    assert entry.get_version() == '-1-0'
+    assert entry.get_size() == -1
@@ -0,0 +1,166 @@
+"""
+水印布局的合成方式与原实现逐像素一致
+
+原实现将照片扩展为 RGBA 画布，再与同样扩展后的水印条做一次整图 alpha_composite；
+现在只在水印条大小的区域内与背景色合成，再与照片分别粘贴到同一张 RGB 画布上。
+这里保留原实现作为参照，覆盖全部水印布局、Logo 居左/居右、RGBA/RGB/L 输入以及非白色背景。
+"""
+
+import pytest
+import yaml
+from PIL import Image
+from PIL import ImageChops
+from PIL import ImageOps
+
+from src.entity.config import Config
+from src.entity.config import DEFAULT_CONFIG_FILENAME
+from src.entity.config import get_resource_path
+from src.entity import image_processor
+from src.entity.image_container import ImageContainer
+from src.entity.image_processor import CustomWatermarkProcessor
+from src.entity.image_processor import DarkWatermarkLeftLogoProcessor
+from src.entity.image_processor import DarkWatermarkRightLogoProcessor
+from src.entity.image_processor import WATERMARK_STRIP_CACHE
+from src.entity.image_processor import WatermarkLeftLogoProcessor
+from src.entity.image_processor import WatermarkProcessor
+from src.entity.image_processor import WatermarkRightLogoProcessor
+from src.enums.constant import TRANSPARENT
+from src.utils import resize_image_with_width
+
+WATERMARK_LAYOUTS = [
+    WatermarkProcessor,
+    WatermarkLeftLogoProcessor,
+    WatermarkRightLogoProcessor,
+    DarkWatermarkLeftLogoProcessor,
+    DarkWatermarkRightLogoProcessor,
+    CustomWatermarkProcessor,
+]
+MODES = ['RGB', 'RGBA', 'L']
+# 横拍和竖拍使用不同比例的水印条
+SIZES = [(180, 120), (120, 180)]
+# 非白色背景，含半透明背景
+BACKGROUND_COLORS = ['#202020', '#ff000080']
+# 测试中水印条渲染时的高度
+STRIP_HEIGHT = 100
+
+
+def load_default_data() -> dict:
+    with open(get_resource_path(DEFAULT_CONFIG_FILENAME), 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+DEFAULT_DATA = load_default_data()
+
+
+def make_config(logo_enable: bool, logo_position: str = 'left', background_color: str | None = None) -> Config:
+    """基于默认配置创建配置对象，不读写配置文件"""
+    config = Config.from_snapshot(DEFAULT_DATA)
+    # 默认字体在首次启动时才下载，使用仓库中自带的备用字体
+    base = config.get_data()['base']
+    base['font'], base['bold_font'] = base['alternative_font'], base['alternative_bold_font']
+    layout = config.get_data()['layout']
+    layout['logo_enable'] = logo_enable
+    layout['logo_position'] = logo_position
+    if background_color is not None:
+        layout['background_color'] = background_color
+    return config
+
+
+@pytest.fixture(scope='module')
+def photo(tmp_path_factory):
+    """
+    带有相机信息的测试图片，内容包含渐变，合成结果中每个像素都可区分
+    """
+    paths = {}
+    for size in SIZES:
+        path = tmp_path_factory.mktemp('photos') / f'{size[0]}x{size[1]}.jpg'
+        gradient = Image.linear_gradient('L').resize(size)
+        img = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT),
+                                  Image.radial_gradient('L').resize(size)))
+        exif = Image.Exif()
+        exif[0x010F] = 'NIKON CORPORATION'  # Make
+        exif[0x0110] = 'NIKON Z 7_2'  # Model
+        # 没有拍摄时间时使用当前时间，两次渲染的文字可能不同
+        exif.get_ifd(0x8769)[0x9003] = '2023:04:09 12:19:19'  # DateTimeOriginal
+        img.save(path, quality=95, exif=exif.tobytes())
+        paths[size] = path
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def clear_strip_cache():
+    WATERMARK_STRIP_CACHE.clear()
+    yield
+    WATERMARK_STRIP_CACHE.clear()
+
+
+@pytest.fixture(autouse=True)
+def small_strip(monkeypatch):
+    """水印条按较小的高度渲染，只影响水印条的分辨率，不影响合成过程"""
+    monkeypatch.setattr(image_processor, 'NORMAL_HEIGHT', STRIP_HEIGHT)
+
+
+def open_container(path, mode: str) -> ImageContainer:
+    container = ImageContainer(path, use_metadata_store=False)
+    img = container.get_watermark_img()
+    if mode == 'RGBA':
+        # 半透明的照片，合成时照片区域直接丢弃透明度
+        converted = img.convert('RGBA')
+        converted.putalpha(Image.linear_gradient('L').resize(img.size))
+        container.update_watermark_img(converted)
+    elif mode != img.mode:
+        container.update_watermark_img(img.convert(mode))
+    return container
+
+
+def legacy_process(processor: WatermarkProcessor, container: ImageContainer) -> None:
+    """
+    原来的合成方式：扩展后的整张 RGBA 画布与扩展后的水印条做 alpha_composite
+    """
+    processor.prepare(container)
+    watermark = resize_image_with_width(processor._render_strip(container), container.get_width())
+    bg = ImageOps.expand(container.get_watermark_img().convert('RGBA'),
+                         border=(0, 0, 0, watermark.height),
+                         fill=processor.bg_color)
+    fg = ImageOps.expand(watermark, border=(0, container.get_height(), 0, 0), fill=TRANSPARENT)
+    container.update_watermark_img(Image.alpha_composite(bg, fg).convert('RGB'))
+
+
+def assert_same_as_legacy(processor_class, config_factory, path, mode) -> None:
+    expected = open_container(path, mode)
+    legacy_process(processor_class(config_factory()), expected)
+    actual = open_container(path, mode)
+    processor_class(config_factory()).process(actual)
+
+    a, b = expected.get_watermark_img(), actual.get_watermark_img()
+    assert (b.mode, b.size) == (a.mode, a.size)
+    assert ImageChops.difference(a, b).getbbox() is None
+    expected.close()
+    actual.close()
+
+
+@pytest.mark.parametrize('size', SIZES, ids=lambda size: f'{size[0]}x{size[1]}')
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('logo_enable', [False, True], ids=['no-logo', 'logo'])
+@pytest.mark.parametrize('processor_class', WATERMARK_LAYOUTS, ids=lambda cls: cls.LAYOUT_ID)
+def test_layout_matches_legacy(photo, processor_class, logo_enable, mode, size):
+    assert_same_as_legacy(processor_class, lambda: make_config(logo_enable), photo[size], mode)
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('logo_position', ['left', 'right'])
+@pytest.mark.parametrize('background_color', BACKGROUND_COLORS)
+def test_custom_background_matches_legacy(photo, background_color, logo_position, mode):
+    assert_same_as_legacy(CustomWatermarkProcessor,
+                          lambda: make_config(True, logo_position, background_color),
+                          photo[SIZES[0]], mode)
+
+
+def test_strip_cache_hit_matches_legacy(photo):
+    """第二次处理使用缓存中合成好的水印条"""
+    processor = WatermarkLeftLogoProcessor(make_config(True))
+    first = open_container(photo[SIZES[0]], 'RGB')
+    processor.process(first)
+    assert len(WATERMARK_STRIP_CACHE) == 1
+    assert_same_as_legacy(WatermarkLeftLogoProcessor, lambda: make_config(True), photo[SIZES[0]], 'RGB')
+    first.close()